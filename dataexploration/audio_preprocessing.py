@@ -0,0 +1,118 @@
+import numpy as np
+from pydub import AudioSegment
+
+# --- Audio preprocessing before transcription ---
+# Works on the decoded PCM with NumPy: the recording is split into short frames,
+# each frame's loudness is computed in one vectorized pass, and only the voiced
+# parts are kept. Leading/trailing silence is dropped, long pauses are shortened,
+# and loudness is normalized. The result is mono 16 kHz, which is what both
+# providers transcribe at anyway, so the upload is also much smaller.
+#
+# The offset map records where each kept chunk came from, so timestamps the
+# providers report on the processed audio can be mapped back to the original:
+#   {"processed_ms": [...], "original_ms": [...]}  chunk start times, in both timelines
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+SILENCE_FLOOR_DBFS = -50.0    # frames quieter than this are always silence
+DYNAMIC_RANGE_DB = 35.0       # ...and so are frames this far below the loud parts of the recording
+SPEECH_PADDING_MS = 200       # kept on each side of speech so word onsets are not clipped
+MAX_PAUSE_MS = 800            # longer pauses are shortened to this
+MIN_SPEECH_MS = 300           # recordings with less voiced audio than this are rejected
+TARGET_DBFS = -20.0           # RMS loudness of the voiced audio after normalization
+PEAK_LIMIT_DBFS = -1.0
+
+
+def _frame_dbfs(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    n_frames = int(np.ceil(len(samples) / frame_len))
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(samples)] = samples
+    rms = np.sqrt(np.mean(padded.reshape(n_frames, frame_len) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-9))
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """Returns [start, end) index pairs of the True runs in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)], axis=1)
+
+
+def preprocess_audio(audio: AudioSegment) -> dict:
+    """
+    Trims silence, shortens long pauses and normalizes loudness.
+
+    Returns:
+        A dict with 'rejected' (True if the recording is near-silent), 'audio'
+        (the processed AudioSegment, or None if rejected), 'offset_map',
+        'original_ms' and 'processed_ms'.
+    """
+    audio = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+    original_ms = len(samples) * 1000 // SAMPLE_RATE
+    result = {"rejected": True, "audio": None, "offset_map": None, "original_ms": original_ms, "processed_ms": 0}
+    if len(samples) == 0:
+        return result
+
+    frame_len = SAMPLE_RATE * FRAME_MS // 1000
+    dbfs = _frame_dbfs(samples, frame_len)
+    threshold = max(SILENCE_FLOOR_DBFS, np.percentile(dbfs, 95) - DYNAMIC_RANGE_DB)
+    voiced = dbfs > threshold
+    if voiced.sum() * FRAME_MS < MIN_SPEECH_MS:
+        return result
+
+    # Widen speech regions by the padding, then shorten the remaining long pauses
+    pad = SPEECH_PADDING_MS // FRAME_MS
+    keep = np.convolve(voiced, np.ones(2 * pad + 1, dtype=bool), mode="same") > 0
+    max_pause = MAX_PAUSE_MS // FRAME_MS
+    first, last = np.flatnonzero(keep)[[0, -1]]
+    for start, end in _runs(~keep[first:last + 1]) + first:
+        if end - start > max_pause:
+            # Keep half the allowed pause on each side of the cut
+            keep[start:start + max_pause // 2] = True
+            keep[end - (max_pause - max_pause // 2):end] = True
+
+    chunks = _runs(keep)
+    chunk_frames = chunks[:, 1] - chunks[:, 0]
+    processed_starts = np.concatenate(([0], np.cumsum(chunk_frames)[:-1]))
+    offset_map = {
+        "processed_ms": (processed_starts * FRAME_MS).tolist(),
+        "original_ms": (chunks[:, 0] * FRAME_MS).tolist(),
+    }
+
+    sample_chunks = [samples[s * frame_len:e * frame_len] for s, e in chunks]
+    processed = np.concatenate(sample_chunks)
+
+    # Normalize the loudness of the voiced frames, then limit the peak
+    voiced_rms = np.sqrt(np.mean(samples[np.repeat(voiced, frame_len)[:len(samples)]] ** 2))
+    gain = 10 ** (TARGET_DBFS / 20) / max(voiced_rms, 1e-9)
+    peak = np.max(np.abs(processed)) * gain
+    gain = min(gain, 10 ** (PEAK_LIMIT_DBFS / 20) / peak) if peak > 0 else gain
+    pcm = np.clip(processed * gain * 32768.0, -32768, 32767).astype(np.int16)
+
+    result.update({
+        "rejected": False,
+        "audio": AudioSegment(pcm.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=1),
+        "offset_map": offset_map,
+        "processed_ms": len(pcm) * 1000 // SAMPLE_RATE,
+    })
+    return result
+
+
+def to_original_ms(offset_map: dict, times_ms: list[int]) -> list[int]:
+    """Maps times on the processed audio back to the original recording."""
+    if not times_ms:
+        return []
+    processed = np.asarray(offset_map["processed_ms"])
+    original = np.asarray(offset_map["original_ms"])
+    times = np.asarray(times_ms)
+    chunk = np.clip(np.searchsorted(processed, times, side="right") - 1, 0, len(processed) - 1)
+    return (original[chunk] + times - processed[chunk]).tolist()
+
+
+def remap_segments(data: dict | None, offset_map: dict | None) -> dict | None:
+    """Rewrites the times of a columnar segment structure (see segments.py) to the original timeline."""
+    if not data or not offset_map:
+        return data
+    for key in ("segment_starts", "segment_ends", "word_starts", "word_ends"):
+        data[key] = to_original_ms(offset_map, data[key])
+    return data
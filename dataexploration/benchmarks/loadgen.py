@@ -0,0 +1,129 @@
+import os
+import time
+import asyncio
+import argparse
+import json
+
+import httpx
+
+from ..runtime_metrics import percentiles
+
+# --- Load generator ---
+# Each virtual user repeatedly uploads a recording (POST /transcripts), polls
+# GET /transcripts/{id} until the job completes, then calls POST /improve.
+# Works against any running server; benchmarks/run.py wires it up to the
+# local provider stand-ins.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_AUDIO = os.path.join(current_dir, "..", "..", "audio", "kasper1.wav")
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.requests = 0
+
+    def record(self, operation: str, started: float, ok: bool = True):
+        self.requests += 1
+        if ok:
+            self.latencies.setdefault(operation, []).append((time.perf_counter() - started) * 1000)
+        else:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    def summary(self, wall_seconds: float, completed_jobs: int) -> dict:
+        return {
+            "wall_seconds": round(wall_seconds, 3),
+            "completed_jobs": completed_jobs,
+            "jobs_per_second": round(completed_jobs / wall_seconds, 3) if wall_seconds else None,
+            "requests_per_second": round(self.requests / wall_seconds, 3) if wall_seconds else None,
+            "errors": self.errors,
+            "latency_ms": {
+                operation: {"count": len(values), **{k: round(v, 1) for k, v in percentiles(values).items()}}
+                for operation, values in sorted(self.latencies.items())
+            },
+        }
+
+
+async def _run_job(client: httpx.AsyncClient, stats: LoadStats, audio: bytes, filename: str,
+                   poll_interval: float, job_timeout: float, improve: bool) -> bool:
+    job_started = time.perf_counter()
+
+    started = time.perf_counter()
+    response = await client.post("/transcripts", files={"file": (filename, audio, "audio/wav")})
+    stats.record("upload", started, response.status_code == 200)
+    if response.status_code != 200:
+        return False
+    transcript_id = response.json()["transcript_id"]
+
+    while True:
+        started = time.perf_counter()
+        response = await client.get(f"/transcripts/{transcript_id}")
+        stats.record("poll", started, response.status_code == 200)
+        data = response.json() if response.status_code == 200 else {}
+        if data.get("status") == "completed":
+            break
+        if data.get("status", "processing") != "processing" or time.perf_counter() - job_started > job_timeout:
+            stats.record("job", job_started, ok=False)
+            return False
+        await asyncio.sleep(poll_interval)
+    stats.record("job", job_started)
+
+    if improve:
+        started = time.perf_counter()
+        response = await client.post("/improve", json={
+            "whisper_transcription": data.get("whisper_transcript") or "",
+            "corti_transcription": data.get("corti_transcript") or "",
+            "transcript_id": transcript_id,
+        })
+        stats.record("improve", started, response.status_code == 200)
+    return True
+
+
+async def run_load(base_url: str, audio_path: str = DEFAULT_AUDIO, jobs: int = 20, concurrency: int = 4,
+                   poll_interval: float = 0.5, job_timeout: float = 120, improve: bool = True) -> dict:
+    """
+    Drives `jobs` upload -> poll -> improve cycles with `concurrency` virtual users.
+
+    Returns:
+        Throughput, error counts and p50/p95/p99 latency per operation ('upload',
+        'poll', 'job' for upload-to-completed, 'improve').
+    """
+    with open(audio_path, "rb") as f:
+        audio = f.read()
+    filename = os.path.basename(audio_path)
+    stats = LoadStats()
+    remaining = iter(range(jobs))
+    completed = 0
+
+    async def virtual_user(client: httpx.AsyncClient):
+        nonlocal completed
+        for _ in remaining:
+            try:
+                if await _run_job(client, stats, audio, filename, poll_interval, job_timeout, improve):
+                    completed += 1
+            except httpx.HTTPError as e:
+                stats.record(type(e).__name__, time.perf_counter(), ok=False)
+
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=job_timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(client) for _ in range(concurrency)))
+        wall_seconds = time.perf_counter() - started
+    return stats.summary(wall_seconds, completed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive load against a running transcription server.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--audio", default=DEFAULT_AUDIO)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--no-improve", action="store_true")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(
+        args.base_url, args.audio, args.jobs, args.concurrency, args.poll_interval, improve=not args.no_improve
+    ))
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,155 @@
+import os
+import json
+import uuid
+import time
+import random
+import asyncio
+
+from fastapi import FastAPI, Request, HTTPException
+
+# --- Local stand-ins for the OpenAI and Corti APIs ---
+# Serves just enough of each API for server.py to run its full pipeline offline.
+# Point the server at it with:
+#   OPENAI_BASE_URL=http://127.0.0.1:8100/v1
+#   CORTI_AUTH_URL=http://127.0.0.1:8100/corti/token
+#   CORTI_API_URL=http://127.0.0.1:8100/corti/v2
+#
+# Latency and failures are configured per provider through environment variables:
+#   MOCK_<PROVIDER>_LATENCY_MS   mean added latency (default 200 for openai, 300 for corti)
+#   MOCK_<PROVIDER>_JITTER_MS    uniform jitter around the mean (default 50)
+#   MOCK_<PROVIDER>_ERROR_RATE   fraction of requests answered with HTTP 500 (default 0)
+# where <PROVIDER> is OPENAI or CORTI.
+
+app = FastAPI()
+
+SAMPLE_SENTENCES = [
+    "Patienten har haft feber og åndenød i to dage.",
+    "Blodtrykket er 95 over 60 og pulsen er 118.",
+    "Vi mistænker sepsis og starter piperacillin tazobactam intravenøst.",
+    "Der tages bloddyrkning og laktat før antibiotika.",
+]
+
+
+def _config(provider: str) -> tuple[float, float, float]:
+    defaults = {"openai": 200, "corti": 300}
+    prefix = f"MOCK_{provider.upper()}_"
+    latency = float(os.getenv(prefix + "LATENCY_MS", defaults[provider]))
+    jitter = float(os.getenv(prefix + "JITTER_MS", 50))
+    error_rate = float(os.getenv(prefix + "ERROR_RATE", 0))
+    return latency, jitter, error_rate
+
+
+async def _simulate(provider: str):
+    latency, jitter, error_rate = _config(provider)
+    await asyncio.sleep(max(0.0, latency + random.uniform(-jitter, jitter)) / 1000)
+    if random.random() < error_rate:
+        raise HTTPException(status_code=500, detail=f"Simulated {provider} failure")
+
+
+# --- OpenAI ---
+@app.post("/v1/audio/transcriptions")
+async def whisper_transcription(request: Request):
+    await request.body()  # drain the upload like the real API would
+    await _simulate("openai")
+    segments, words, start = [], [], 0.0
+    for i, sentence in enumerate(SAMPLE_SENTENCES):
+        end = start + 2.5
+        segments.append({"id": i, "seek": 0, "start": start, "end": end, "text": " " + sentence,
+                         "tokens": [], "temperature": 0.0, "avg_logprob": -0.2,
+                         "compression_ratio": 1.2, "no_speech_prob": 0.01})
+        tokens = sentence.split()
+        step = (end - start) / len(tokens)
+        for j, token in enumerate(tokens):
+            words.append({"word": token, "start": start + j * step, "end": start + (j + 1) * step})
+        start = end + 0.3
+    return {
+        "task": "transcribe",
+        "language": "danish",
+        "duration": start,
+        "text": " ".join(SAMPLE_SENTENCES),
+        "segments": segments,
+        "words": words,
+    }
+
+
+def _fake_parsed_output(schema_name: str) -> dict:
+    if schema_name == "Manuscript":
+        return {
+            "title": "Sepsis hos ældre patient",
+            "prose": " ".join(SAMPLE_SENTENCES),
+            "key_takeaways": ["Tidlig antibiotika", "Mål laktat", "Overvåg blodtryk"],
+        }
+    if schema_name == "Manuscripts":
+        return {"manuscripts": [_fake_parsed_output("Manuscript") for _ in range(5)]}
+    sentences = [
+        {
+            "text": sentence,
+            "is_uncertain": i == 2,
+            "has_medical_terminology": True,
+            "specific_uncertain_word": ["piperacillin"] if i == 2 else [],
+            "best_model_for_medical_terminology": "corti",
+            "best_everyday_speech": "tie",
+        }
+        for i, sentence in enumerate(SAMPLE_SENTENCES)
+    ]
+    return {"sentences": sentences}
+
+
+@app.post("/v1/responses")
+async def responses(request: Request):
+    body = await request.json()
+    await _simulate("openai")
+    schema_name = body.get("text", {}).get("format", {}).get("name", "")
+    output = _fake_parsed_output(schema_name)
+    if schema_name == "RefinedSentences":
+        # Echo the ids of the target sentences back, as the real model is instructed to
+        prompt = json.dumps(body.get("input", []))
+        ids = [part.split()[0] for part in prompt.split("id=")[1:]]
+        output["sentences"] = [dict(output["sentences"][0], id=i) for i in ids]
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "mock"),
+        "status": "completed",
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": json.dumps(output), "annotations": []}],
+        }],
+    }
+
+
+# --- Corti ---
+@app.post("/corti/token")
+async def corti_token():
+    await _simulate("corti")
+    return {"access_token": "mock-token", "token_type": "Bearer", "expires_in": 300}
+
+
+@app.post("/corti/v2/interactions/")
+async def corti_create_interaction():
+    await _simulate("corti")
+    return {"interactionId": str(uuid.uuid4())}
+
+
+@app.post("/corti/v2/interactions/{interaction_id}/recordings/")
+async def corti_upload_recording(interaction_id: str, request: Request):
+    await request.body()
+    await _simulate("corti")
+    return {"recordingId": str(uuid.uuid4())}
+
+
+@app.post("/corti/v2/interactions/{interaction_id}/transcripts")
+async def corti_create_transcript(interaction_id: str):
+    await _simulate("corti")
+    transcripts, start = [], 0
+    for i, sentence in enumerate(SAMPLE_SENTENCES):
+        transcripts.append({"text": sentence, "start": start, "end": start + 2500, "speakerId": i % 2, "channel": 0})
+        start += 2800
+    return {"id": str(uuid.uuid4()), "transcripts": transcripts}
@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import datetime
+import subprocess
+
+import httpx
+
+from .loadgen import run_load, DEFAULT_AUDIO
+
+# --- Benchmark runner ---
+# Starts the provider stand-ins and the API server as subprocesses, drives load
+# through them, and appends the results to results/history.jsonl together with
+# the current git commit. Each run is compared with the last run that used the
+# same settings, so regressions show up between commits.
+#
+#   DATABASE_URL=postgresql+asyncpg://.../bench uv run python -m dataexploration.benchmarks.run --jobs 40 --concurrency 8
+#
+# Use a dedicated database: the benchmark creates real transcript rows.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(current_dir, "..", ".."))
+RESULTS_FILE = os.path.join(current_dir, "results", "history.jsonl")
+
+# Lower-is-better metrics compared between runs, as paths into the result record
+COMPARED_METRICS = [
+    ("load", "latency_ms", "upload", "p95"),
+    ("load", "latency_ms", "poll", "p95"),
+    ("load", "latency_ms", "job", "p95"),
+    ("load", "latency_ms", "improve", "p95"),
+    ("runtime", "event_loop_lag", "p99"),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(app: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env,
+    )
+
+
+def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process serving {url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout} seconds")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _lookup(record: dict, path: tuple) -> float | None:
+    value = record
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare_with_previous(record: dict, threshold: float) -> list[str]:
+    """Returns a line per metric that got worse by more than `threshold` (a fraction) since the last comparable run."""
+    if not os.path.exists(RESULTS_FILE):
+        return []
+    previous = None
+    with open(RESULTS_FILE) as f:
+        for line in f:
+            candidate = json.loads(line)
+            if candidate.get("settings") == record["settings"]:
+                previous = candidate
+    if previous is None:
+        return []
+
+    regressions = []
+    for path in COMPARED_METRICS:
+        before, after = _lookup(previous, path), _lookup(record, path)
+        if before and after and after > before * (1 + threshold):
+            regressions.append(f"{'.'.join(path)}: {before:.1f} -> {after:.1f} ms (commit {previous.get('commit')} -> {record.get('commit')})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transcription API against local provider stand-ins.")
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--audio", default=DEFAULT_AUDIO)
+    parser.add_argument("--openai-latency-ms", type=float, default=200)
+    parser.add_argument("--corti-latency-ms", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Simulated failure rate for both providers")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("Set DATABASE_URL to a dedicated benchmark database.")
+
+    mock_port, server_port = _free_port(), _free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    env = dict(os.environ)
+    env.update({
+        "MOCK_OPENAI_LATENCY_MS": str(args.openai_latency_ms),
+        "MOCK_CORTI_LATENCY_MS": str(args.corti_latency_ms),
+        "MOCK_OPENAI_ERROR_RATE": str(args.error_rate),
+        "MOCK_CORTI_ERROR_RATE": str(args.error_rate),
+        "OPENAI_BASE_URL": f"{mock_url}/v1",
+        "OPENAI_API_KEY": "mock-key",
+        "CORTI_AUTH_URL": f"{mock_url}/corti/token",
+        "CORTI_API_URL": f"{mock_url}/corti/v2",
+        "CORTI_CLIENT_ID": "mock", "CORTI_CLIENT_SECRET": "mock",
+        "CORTI_ENVIRONMENT": "mock", "CORTI_TENANT_NAME": "mock",
+        "BENCHMARK_METRICS": "1",
+    })
+
+    mock = _start("dataexploration.benchmarks.mock_providers:app", mock_port, env)
+    server = _start("dataexploration.server:app", server_port, env)
+    base_url = f"http://127.0.0.1:{server_port}"
+    try:
+        _wait_until_up(f"{mock_url}/docs", mock)
+        _wait_until_up(f"{base_url}/", server)
+        httpx.post(f"{base_url}/debug/runtime/reset")
+
+        print(f"Running {args.jobs} jobs with {args.concurrency} virtual users...")
+        load = asyncio.run(run_load(base_url, args.audio, args.jobs, args.concurrency, args.poll_interval))
+        runtime = httpx.get(f"{base_url}/debug/runtime").json()
+    finally:
+        for process in (server, mock):
+            process.terminate()
+            process.wait(timeout=10)
+
+    settings = {k: v for k, v in vars(args).items() if k not in ("threshold", "fail_on_regression")}
+    settings["audio"] = os.path.basename(settings["audio"])
+    record = {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "settings": settings,
+        "load": load,
+        "runtime": runtime,
+    }
+    print(json.dumps(record, indent=2))
+
+    regressions = compare_with_previous(record, args.threshold)
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+    with open(RESULTS_FILE, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Results appended to {RESULTS_FILE}")
+
+    if regressions:
+        print("\nRegressions since the last comparable run:")
+        for line in regressions:
+            print(f"  {line}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import uuid
 import requests
 from dotenv import load_dotenv
 # Use a relative import because it's in the same package
-from .get_corti_bearer_token import get_access_token
+from .get_corti_bearer_token import get_access_token, API_URL
 
 load_dotenv()
 
@@ -19,7 +19,7 @@ def create_corti_interaction(access_token: str) -> str | None:
         The interaction ID if successful, otherwise None.
     """
     print("\nCreating a new interaction...")
-    url = "https://api.eu.corti.app/v2/interactions/"
+    url = f"{API_URL}/interactions/"
     run_uuid = uuid.uuid4()
 
     payload = {
@@ -3,17 +3,22 @@ import json
 import os
 
 # Use relative imports for modules in the same package
-from .get_corti_bearer_token import get_access_token
+from .get_corti_bearer_token import get_access_token, API_URL
 from .corti_create_new_interaction import create_corti_interaction
 from .create_upload_recording import upload_recording
+from .segments import build_segments, empty_segments
 
-def create_transcript(access_token: str, interaction_id: str, recording_id: str) -> str | None:
+def create_transcript(access_token: str, interaction_id: str, recording_id: str) -> dict | None:
     """
-    Requests a transcript and returns the transcribed text.
+    Requests a diarized transcript.
+
+    Returns:
+        The columnar segment structure from `segments.build_segments`, with
+        segment timings and speaker labels.
     """
     print("\nRequesting transcript...")
     try:
-        url = f"https://api.eu.corti.app/v2/interactions/{interaction_id}/transcripts"
+        url = f"{API_URL}/interactions/{interaction_id}/transcripts"
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Tenant-Name": "base",
@@ -23,7 +28,7 @@ def create_transcript(access_token: str, interaction_id: str, recording_id: str)
             "recordingId": recording_id,
             "primaryLanguage": "da",
             "modelName": "Base",
-            "diarize": False
+            "diarize": True
         }
         
         response = requests.post(url, headers=headers, json=payload)
@@ -33,10 +38,19 @@ def create_transcript(access_token: str, interaction_id: str, recording_id: str)
         print("Transcript created successfully!")
         
         if transcript_data.get("transcripts"):
-            full_text = " ".join([t['text'] for t in transcript_data['transcripts']])
-            print(f"\n>>> Corti Transcription: {full_text}")
-            return full_text
-        return "[Transcription in progress or failed]"
+            segments = [
+                {
+                    "text": t['text'],
+                    "start_ms": t.get('start', 0),
+                    "end_ms": t.get('end', 0),
+                    "speaker": t.get('speakerId', t.get('participant')),
+                }
+                for t in transcript_data['transcripts']
+            ]
+            result = build_segments(segments)
+            print(f"\n>>> Corti Transcription: {result['text']}")
+            return result
+        return empty_segments("[Transcription in progress or failed]")
 
     except requests.exceptions.RequestException as e:
         print(f"\nAn API error occurred while creating transcript: {e}")
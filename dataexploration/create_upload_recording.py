@@ -2,21 +2,9 @@ import requests
 import json
 import os
 # Use relative imports for modules in the same package
-from .get_corti_bearer_token import get_access_token
+from .get_corti_bearer_token import get_access_token, API_URL
 from .corti_create_new_interaction import create_corti_interaction
 
-# --- 1. Get a fresh access token ---
-try:
-    print("Getting a new access token...")
-    access_token = get_access_token()
-    print("Successfully retrieved token.")
-except requests.exceptions.RequestException as e:
-    print(f"Failed to get access token: {e}")
-    exit()
-
-# --- 2. Create a new Interaction using the function ---
-interaction_id = create_corti_interaction(access_token)
-
 def upload_recording(access_token: str, interaction_id: str, file_path: str) -> str | None:
     """
     Uploads a recording for a given interaction.
@@ -36,7 +24,7 @@ def upload_recording(access_token: str, interaction_id: str, file_path: str) ->
         return None
 
     try:
-        upload_url = f"https://api.eu.corti.app/v2/interactions/{interaction_id}/recordings/"
+        upload_url = f"{API_URL}/interactions/{interaction_id}/recordings/"
         
         headers = {
             "Authorization": f"Bearer {access_token}",
@@ -63,7 +51,20 @@ def upload_recording(access_token: str, interaction_id: str, file_path: str) ->
             print(f"Response Body: {e.response.text}")
         return None
 
-# --- 3. Upload the Recording to the new Interaction ---
-if interaction_id:
-    audio_file_path = "../audio/kasper1.wav"
-    upload_recording(access_token, interaction_id, audio_file_path)
\ No newline at end of file
+if __name__ == "__main__":
+    # --- 1. Get a fresh access token ---
+    try:
+        print("Getting a new access token...")
+        access_token = get_access_token()
+        print("Successfully retrieved token.")
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to get access token: {e}")
+        exit()
+
+    # --- 2. Create a new Interaction using the function ---
+    interaction_id = create_corti_interaction(access_token)
+
+    # --- 3. Upload the Recording to the new Interaction ---
+    if interaction_id:
+        audio_file_path = "../audio/kasper1.wav"
+        upload_recording(access_token, interaction_id, audio_file_path)
\ No newline at end of file
@@ -2,6 +2,8 @@ import os
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from .segments import build_segments
+
 # Load variables from .env file
 load_dotenv()
 
@@ -14,9 +16,13 @@ except Exception as e:
     print("Please make sure your OPENAI_API_KEY is set correctly in the .env file.")
     exit()
 
-def transcribe_with_whisper(file_path: str) -> str | None:
+def transcribe_with_whisper(file_path: str) -> dict | None:
     """
-    Transcribes the given audio file using OpenAI's Whisper API and returns the text.
+    Transcribes the given audio file using OpenAI's Whisper API.
+
+    Returns:
+        The columnar segment structure from `segments.build_segments`, with
+        segment and word timings. Whisper does not label speakers.
     """
     print(f"\nTranscribing {file_path} with Whisper...")
 
@@ -28,12 +34,25 @@ def transcribe_with_whisper(file_path: str) -> str | None:
         with open(file_path, "rb") as audio_file:
             transcription = client.audio.transcriptions.create(
               model="whisper-1",
-              file=audio_file
+              file=audio_file,
+              response_format="verbose_json",
+              timestamp_granularities=["segment", "word"]
             )
         
         print("Whisper transcription successful!")
         print(f"\n>>> Whisper Transcription: {transcription.text}")
-        return transcription.text
+
+        segments = [
+            {"text": s.text, "start_ms": s.start * 1000, "end_ms": s.end * 1000}
+            for s in (transcription.segments or [])
+        ]
+        words = [
+            {"text": w.word, "start_ms": w.start * 1000, "end_ms": w.end * 1000}
+            for w in (transcription.words or [])
+        ]
+        if not segments:
+            segments = [{"text": transcription.text, "start_ms": 0, "end_ms": 0}]
+        return build_segments(segments, words)
 
     except Exception as e:
         print(f"An error occurred with the Whisper API call: {e}")
@@ -1,8 +1,8 @@
 import os
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, DateTime, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import String, DateTime, JSON, Integer, ForeignKey, Index, Computed, FetchedValue, DDL, event, text
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 import uuid
 import datetime
 
@@ -22,6 +22,30 @@ AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 class Base(DeclarativeBase):
     pass
 
+# --- Search columns ---
+# Text search configuration used for the generated tsvector and for queries
+TS_CONFIG = "danish"
+
+# The sentence texts of improved_transcript joined by spaces, e.g. ["a", "b"] -> 'a b'.
+# The elements are unescaped JSON strings, so quotes, backslashes and newlines come out
+# as typed. The function must exist before the table, hence the before_create hook below.
+IMPROVED_TEXT_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION improved_transcript_text(doc json) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT coalesce(string_agg(sentence.value, ' ' ORDER BY sentence.n), '')
+    FROM jsonb_array_elements_text(jsonb_path_query_array(doc::jsonb, '$.sentences[*].text'))
+        WITH ORDINALITY AS sentence(value, n)
+$$"""
+# Generated columns cannot reference each other, so search_vector calls the function too
+IMPROVED_TEXT_SQL = "improved_transcript_text(improved_transcript)"
+
+# Improved text ranks above the raw engine output
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{TS_CONFIG}', {IMPROVED_TEXT_SQL}), 'A') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(corti_transcript, '')), 'B') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(whisper_transcript, '')), 'B')"
+)
+
 # Define the Transcript table model
 class Transcript(Base):
     __tablename__ = "transcripts"
@@ -32,13 +56,130 @@ class Transcript(Base):
     whisper_transcript: Mapped[str | None] = mapped_column(String)
     corti_transcript: Mapped[str | None] = mapped_column(String)
     improved_transcript: Mapped[dict | None] = mapped_column(JSON)
+    # Columnar segment/word timings, see segments.py for the layout
+    whisper_segments: Mapped[dict | None] = mapped_column(JSON, deferred=True)
+    corti_segments: Mapped[dict | None] = mapped_column(JSON, deferred=True)
+    # Silence trimming, see audio_preprocessing.py; the offset map links trimmed and original times
+    audio_duration_ms: Mapped[int | None] = mapped_column(Integer)
+    processed_duration_ms: Mapped[int | None] = mapped_column(Integer)
+    audio_offset_map: Mapped[dict | None] = mapped_column(JSON, deferred=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow)
+    completed_at: Mapped[datetime.datetime | None] = mapped_column(DateTime, index=True)
+    # Set by the transcripts_touch trigger on every UPDATE, including raw SQL ones (see MIGRATIONS);
+    # the version drives the ETag of GET /transcripts/{id}
+    version: Mapped[int] = mapped_column(Integer, server_default="1", server_onupdate=FetchedValue())
+    updated_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime, default=datetime.datetime.utcnow, server_onupdate=FetchedValue(), index=True
+    )
+    # Upload file name inside temp_uploads/; the converted WAV is the same name + ".wav"
+    audio_path: Mapped[str | None] = mapped_column(String)
+    # Maintained by Postgres whenever the row is written; only read by /transcripts/search
+    improved_text: Mapped[str | None] = mapped_column(String, Computed(IMPROVED_TEXT_SQL, persisted=True), deferred=True)
+    search_vector: Mapped[str | None] = mapped_column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True), deferred=True)
+
+event.listen(Transcript.__table__, "before_create", DDL(IMPROVED_TEXT_FUNCTION_SQL))
+
+# One row per save or refinement of an improved transcript
+class TranscriptEdit(Base):
+    __tablename__ = "transcript_edits"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    transcript_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("transcripts.id"), index=True)
+    version: Mapped[int] = mapped_column(Integer)
+    source: Mapped[str] = mapped_column(String)  # "user", "improve" or "refine"
+    changes: Mapped[list] = mapped_column(JSON)  # see sentence_versions.diff_sentences
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow)
 
+# Lexicon terms found in a transcript, one row per (transcript, source, term). See terminology.py
+class TranscriptTerm(Base):
+    __tablename__ = "transcript_terms"
+    # varchar_pattern_ops lets `term_key LIKE 'prefix%'` use the index regardless of collation
+    __table_args__ = (
+        Index("ix_transcript_terms_term_key", "term_key", postgresql_ops={"term_key": "varchar_pattern_ops"}),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    transcript_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("transcripts.id"), index=True)
+    source: Mapped[str] = mapped_column(String)  # "whisper", "corti" or "improved"
+    term: Mapped[str] = mapped_column(String)
+    term_key: Mapped[str] = mapped_column(String)  # lowercased term, for case-insensitive search
+    count: Mapped[int] = mapped_column(Integer)
+
+# Pre-generated manuscripts; rows with served_at NULL form the pool that /manuscript serves from
+class ManuscriptRecord(Base):
+    __tablename__ = "manuscripts"
+    __table_args__ = (
+        Index("ix_manuscripts_pool", "topic_key", "created_at", postgresql_where=text("served_at IS NULL")),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    topic: Mapped[str] = mapped_column(String)
+    topic_key: Mapped[str] = mapped_column(String, index=True)  # normalized topic, see manuscript_pool.topic_key
+    title: Mapped[str] = mapped_column(String)
+    prose: Mapped[str] = mapped_column(String)
+    key_takeaways: Mapped[list] = mapped_column(JSON)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow)
+    served_at: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+
+# create_all does not add columns to a table that already exists, so columns
+# added after the first deploy are listed here and applied on startup.
+MIGRATIONS = [
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS whisper_segments JSON",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS corti_segments JSON",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS audio_duration_ms INTEGER",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS processed_duration_ms INTEGER",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS audio_offset_map JSON",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP WITHOUT TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_completed_at ON transcripts (completed_at)",
+    # Rows completed before completed_at existed; a no-op once they are filled in
+    "UPDATE transcripts SET completed_at = created_at WHERE status = 'completed' AND completed_at IS NULL",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS audio_path VARCHAR",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE",
+    "UPDATE transcripts SET updated_at = coalesce(completed_at, created_at) WHERE updated_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_updated_at ON transcripts (updated_at)",
+    # Bumps version and updated_at on every UPDATE, so bulk and raw SQL updates change the ETag too
+    """CREATE OR REPLACE FUNCTION transcripts_touch() RETURNS trigger AS $$
+    BEGIN
+        NEW.version := OLD.version + 1;
+        -- clock_timestamp, not now(): now() is the transaction start, which can be long before the commit
+        NEW.updated_at := timezone('utc', clock_timestamp());
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS transcripts_touch ON transcripts",
+    "CREATE TRIGGER transcripts_touch BEFORE UPDATE ON transcripts FOR EACH ROW EXECUTE FUNCTION transcripts_touch()",
+    # Full-text and fuzzy search (user-facing endpoint: GET /transcripts/search)
+    IMPROVED_TEXT_FUNCTION_SQL,
+    # Columns generated by the earlier regex over the JSON text kept JSON escapes; rebuild them
+    """DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_attrdef d JOIN pg_attribute a ON a.attrelid = d.adrelid AND a.attnum = d.adnum
+            WHERE d.adrelid = 'transcripts'::regclass AND a.attname = 'improved_text'
+              AND pg_get_expr(d.adbin, d.adrelid) NOT LIKE '%improved_transcript_text%'
+        ) THEN
+            ALTER TABLE transcripts DROP COLUMN search_vector, DROP COLUMN improved_text;
+        END IF;
+    END
+    $$""",
+    f"ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS improved_text VARCHAR GENERATED ALWAYS AS ({IMPROVED_TEXT_SQL}) STORED",
+    f"ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_search_vector ON transcripts USING gin (search_vector)",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_whisper_trgm ON transcripts USING gin (whisper_transcript gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_corti_trgm ON transcripts USING gin (corti_transcript gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_improved_trgm ON transcripts USING gin (improved_text gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_created_at ON transcripts (created_at DESC)",
+]
+
 async def init_db():
-    """Creates the database tables."""
+    """Creates the database tables and applies pending column migrations."""
     async with engine.begin() as conn:
         # await conn.run_sync(Base.metadata.drop_all) # Use this to reset the DB
         await conn.run_sync(Base.metadata.create_all)
+        for statement in MIGRATIONS:
+            await conn.execute(text(statement))
 
 # Dependency to get a DB session in API endpoints
 async def get_db():
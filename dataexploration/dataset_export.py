@@ -0,0 +1,235 @@
+import os
+import json
+import uuid
+import asyncio
+import argparse
+import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, func, tuple_, literal, Interval
+
+from .database import engine, Transcript
+
+# --- Dataset export ---
+# Streams labelled transcripts (completed and run through /improve) out of the database with a server-side cursor,
+# attaches their audio from temp_uploads/ and writes Parquet shards of bounded
+# size that `datasets.load_dataset("parquet", data_dir=...)` loads with a
+# decodable `audio` column, like the CoRal dataset in load_coral.py.
+#
+# Exports are incremental: the (updated_at, id) of the last exported row is
+# kept in _watermark.json in the output directory and the next run starts after it.
+# A transcript that is edited after it was exported is exported again by the next
+# run, so readers should keep the row with the latest updated_at per id.
+#
+# updated_at is stamped before the writing transaction commits, so a row can become
+# visible with a timestamp slightly in the past. Rows changed within SETTLE_TIME are
+# left for the next run so the watermark never passes a row that is still in flight.
+#
+#   uv run python -m dataexploration.dataset_export --out exports/transcripts
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+UPLOADS_DIR = os.path.join(current_dir, "temp_uploads")
+
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("audio", pa.struct([("bytes", pa.binary()), ("path", pa.string())])),
+    ("text", pa.string()),
+    ("whisper_text", pa.string()),
+    ("corti_text", pa.string()),
+    ("improved_text", pa.string()),
+    ("improved_transcript", pa.string()),
+    ("original_filename", pa.string()),
+    ("audio_duration_ms", pa.int32()),
+    ("processed_duration_ms", pa.int32()),
+    ("created_at", pa.timestamp("us")),
+    ("completed_at", pa.timestamp("us")),
+    ("updated_at", pa.timestamp("us")),
+])
+
+# Hugging Face `datasets` reads the feature types from this schema metadata
+_FEATURES = {
+    name: {"dtype": "timestamp[us]" if name.endswith("_at") else str(SCHEMA.field(name).type), "_type": "Value"}
+    for name in SCHEMA.names if name != "audio"
+}
+_FEATURES["audio"] = {"_type": "Audio"}
+SCHEMA = SCHEMA.with_metadata({"huggingface": json.dumps({"info": {"features": _FEATURES}})})
+
+SETTLE_TIME = datetime.timedelta(minutes=5)
+
+_COLUMNS = [
+    Transcript.id,
+    Transcript.audio_path,
+    Transcript.whisper_transcript,
+    Transcript.corti_transcript,
+    Transcript.improved_text,
+    Transcript.improved_transcript,
+    Transcript.original_filename,
+    Transcript.audio_duration_ms,
+    Transcript.processed_duration_ms,
+    Transcript.created_at,
+    Transcript.completed_at,
+    Transcript.updated_at,
+]
+
+
+def _read_audio(audio_path: str) -> tuple[bytes, str] | None:
+    """Prefers the converted (trimmed, 16 kHz mono) WAV the transcripts were made from."""
+    for name in (audio_path + ".wav", audio_path):
+        path = os.path.join(UPLOADS_DIR, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read(), name
+    return None
+
+
+class ShardWriter:
+    """Writes record batches to Parquet files, starting a new file once one reaches `max_bytes`."""
+
+    def __init__(self, data_dir: str, run_id: str, max_bytes: int):
+        self.data_dir = data_dir
+        self.run_id = run_id
+        self.max_bytes = max_bytes
+        self.shards: list[str] = []
+        self._writer: pq.ParquetWriter | None = None
+        self._tmp_path = None
+        self._bytes = 0
+        os.makedirs(data_dir, exist_ok=True)
+
+    def write(self, batch: pa.RecordBatch):
+        if self._writer and self._bytes + batch.nbytes > self.max_bytes:
+            self._finish_shard()
+        if not self._writer:
+            self._tmp_path = os.path.join(self.data_dir, f"shard-{self.run_id}-{len(self.shards):05d}.parquet.tmp")
+            self._writer = pq.ParquetWriter(self._tmp_path, SCHEMA)
+            self._bytes = 0
+        # Each batch becomes one row group, so readers can stream the shard too
+        self._writer.write_batch(batch)
+        self._bytes += batch.nbytes
+
+    def _finish_shard(self):
+        self._writer.close()
+        final_path = self._tmp_path[:-len(".tmp")]
+        os.replace(self._tmp_path, final_path)
+        self.shards.append(final_path)
+        self._writer = None
+
+    def close(self):
+        if self._writer:
+            self._finish_shard()
+
+
+def _read_watermark(out_dir: str) -> tuple[datetime.datetime, str] | None:
+    path = os.path.join(out_dir, "_watermark.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    if "updated_at" not in data:
+        # Watermarks from before exports followed updated_at; those runs missed later labels
+        print("Ignoring a completed_at watermark; exporting everything again.")
+        return None
+    return datetime.datetime.fromisoformat(data["updated_at"]), data["id"]
+
+
+def _write_watermark(out_dir: str, updated_at: datetime.datetime, transcript_id: str):
+    path = os.path.join(out_dir, "_watermark.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump({"updated_at": updated_at.isoformat(), "id": transcript_id}, f)
+    os.replace(path + ".tmp", path)
+
+
+def _to_batch(rows: list) -> tuple[pa.RecordBatch | None, int]:
+    """Builds a record batch from database rows, reading each row's audio. Returns (batch, rows skipped)."""
+    records = []
+    for row in rows:
+        audio = _read_audio(row.audio_path) if row.audio_path else None
+        if audio is None:
+            continue
+        audio_bytes, audio_name = audio
+        records.append({
+            "id": str(row.id),
+            "audio": {"bytes": audio_bytes, "path": audio_name},
+            "text": row.improved_text or None,
+            "whisper_text": row.whisper_transcript,
+            "corti_text": row.corti_transcript,
+            "improved_text": row.improved_text or None,
+            "improved_transcript": json.dumps(row.improved_transcript) if row.improved_transcript else None,
+            "original_filename": row.original_filename,
+            "audio_duration_ms": row.audio_duration_ms,
+            "processed_duration_ms": row.processed_duration_ms,
+            "created_at": row.created_at,
+            "completed_at": row.completed_at,
+            "updated_at": row.updated_at,
+        })
+    skipped = len(rows) - len(records)
+    if not records:
+        return None, skipped
+    return pa.RecordBatch.from_pylist(records, schema=SCHEMA), skipped
+
+
+async def export_dataset(out_dir: str, max_shard_bytes: int = 256 * 1024 * 1024,
+                         batch_rows: int = 64, full: bool = False) -> dict:
+    """
+    Exports labelled transcripts changed since the last watermark (or all of them if `full`).
+
+    At most `batch_rows` rows and their audio are held in memory at a time.
+
+    Returns:
+        Counts of exported and skipped rows (rows whose audio file is missing) and the shard paths.
+    """
+    watermark = None if full else _read_watermark(out_dir)
+    query = (
+        select(*_COLUMNS)
+        .where(
+            Transcript.status == "completed",
+            Transcript.updated_at.is_not(None),
+            Transcript.updated_at < func.timezone("utc", func.now()) - literal(SETTLE_TIME, Interval),
+            # Only rows with an improved transcript have a label to train on
+            Transcript.improved_text != "",
+        )
+        .order_by(Transcript.updated_at, Transcript.id)
+    )
+    if watermark:
+        query = query.where(
+            tuple_(Transcript.updated_at, Transcript.id) > tuple_(literal(watermark[0]), literal(uuid.UUID(watermark[1]), Transcript.id.type))
+        )
+
+    run_id = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    writer = ShardWriter(os.path.join(out_dir, "data"), run_id, max_shard_bytes)
+    exported = skipped = 0
+    last_row = None
+
+    async with engine.connect() as conn:
+        # stream() + yield_per uses a server-side cursor instead of fetching every row
+        result = await conn.stream(query.execution_options(yield_per=batch_rows))
+        async for rows in result.partitions(batch_rows):
+            batch, batch_skipped = _to_batch(rows)
+            if batch is not None:
+                writer.write(batch)
+                exported += batch.num_rows
+            skipped += batch_skipped
+            last_row = rows[-1]
+    writer.close()
+
+    # Only move the watermark once every shard of this run is safely on disk
+    if last_row is not None:
+        _write_watermark(out_dir, last_row.updated_at, str(last_row.id))
+    return {"exported": exported, "skipped_missing_audio": skipped, "shards": writer.shards}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export labelled transcripts and audio as Parquet dataset shards.")
+    parser.add_argument("--out", required=True, help="Output directory; shards go to <out>/data/")
+    parser.add_argument("--max-shard-mb", type=int, default=256)
+    parser.add_argument("--batch-rows", type=int, default=64)
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and export everything")
+    args = parser.parse_args()
+
+    summary = asyncio.run(export_dataset(
+        args.out, args.max_shard_mb * 1024 * 1024, args.batch_rows, args.full
+    ))
+    print(f"Exported {summary['exported']} transcript(s) into {len(summary['shards'])} shard(s); "
+          f"skipped {summary['skipped_missing_audio']} without an audio file.")
+    for shard in summary["shards"]:
+        print(f"  {shard}")
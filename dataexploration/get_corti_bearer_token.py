@@ -14,27 +14,32 @@ TENANT = os.getenv("CORTI_TENANT_NAME")
 if not all([CLIENT_ID, CLIENT_SECRET, ENV, TENANT]):
     raise ValueError("One or more Corti environment variables are not set in the .env file.")
 
-URL = (
+# Both URLs can be overridden, e.g. to point at the local stand-ins in benchmarks/
+URL = os.getenv("CORTI_AUTH_URL") or (
     f"https://keycloak.{ENV}.corti.app"
     f"/realms/{TENANT}/protocol/openid-connect/token"
 )
+API_URL = os.getenv("CORTI_API_URL", "https://api.eu.corti.app/v2")
 
 def get_access_token():
-    r = requests.post(
-        URL,
-        data={
-            "client_id": CLIENT_ID,
-            "client_secret": CLIENT_SECRET,
-            "grant_type": "client_credentials",
-            "scope": "openid"
-        },
-    )
-    r.raise_for_status()
-    return r.json()["access_token"]
+    """Returns a bearer token, or None if the token request fails (like the other Corti helpers)."""
+    try:
+        r = requests.post(
+            URL,
+            data={
+                "client_id": CLIENT_ID,
+                "client_secret": CLIENT_SECRET,
+                "grant_type": "client_credentials",
+                "scope": "openid"
+            },
+        )
+        r.raise_for_status()
+        return r.json()["access_token"]
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        print(f"Error getting Corti access token: {e}")
+        return None
 
 if __name__ == "__main__":
-    try:
-        token = get_access_token()
-        print(token)
-    except (requests.exceptions.RequestException, ValueError) as e:
-        print(f"Error: {e}")
\ No newline at end of file
+    token = get_access_token()
+    if token:
+        print(token)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
-from openai import OpenAI
+import asyncio
+from openai import OpenAI, AsyncOpenAI
 from pydantic import BaseModel, Field
 from typing import List
 from dotenv import load_dotenv
@@ -10,9 +11,12 @@ load_dotenv()
 # --- 1. Setup OpenAI Client ---
 try:
     client = OpenAI()
+    # Used for batch generation; retries back off on 429 rate-limit responses
+    async_client = AsyncOpenAI(max_retries=5)
 except Exception as e:
     print(f"Error initializing OpenAI client: {e}")
     client = None
+    async_client = None
 
 # --- 2. Define the desired JSON output structure using Pydantic ---
 class Manuscript(BaseModel):
@@ -21,18 +25,13 @@ class Manuscript(BaseModel):
     prose: str = Field(description="The main body of the manuscript, written in realistic, professional prose as a doctor might explain the topic. It should be well-structured and informative.")
     key_takeaways: List[str] = Field(description="A list of 3-5 bullet points summarizing the most critical information from the prose.")
 
-# --- 3. Create the function to call the chat model ---
-def generate_manuscript(topic: str) -> Manuscript | None:
-    """
-    Uses a chat model to generate a structured medical manuscript about a topic.
-    """
-    if not client:
-        print("OpenAI client not initialized.")
-        return None
-
-    print(f"\nAsking OpenAI to generate a manuscript on: {topic}...")
+class Manuscripts(BaseModel):
+    """Several distinct manuscripts on the same topic."""
+    manuscripts: List[Manuscript]
 
-    system_prompt = f"""
+# --- 3. Create the functions to call the chat model ---
+def _system_prompt(topic: str, count: int = 1) -> str:
+    prompt = f"""
     You are a highly knowledgeable medical professional and a skilled writer. Your task is to generate a clear, concise, and informative manuscript on the given topic: "{topic}".
 
     The manuscript should be written in realistic prose, as if a doctor were explaining the concept to a colleague or a medical student. It must be accurate and professionally toned.
@@ -44,6 +43,23 @@ def generate_manuscript(topic: str) -> Manuscript | None:
     
     Please structure your response according to the provided JSON schema, including a title, the main prose, and a list of key takeaways.
     """
+    if count > 1:
+        prompt += f"""
+    Write {count} such manuscripts. Each must describe a different patient case, with its own title, so that together they cover as much varied vocabulary as possible.
+    """
+    return prompt
+
+def generate_manuscript(topic: str) -> Manuscript | None:
+    """
+    Uses a chat model to generate a structured medical manuscript about a topic.
+    """
+    if not client:
+        print("OpenAI client not initialized.")
+        return None
+
+    print(f"\nAsking OpenAI to generate a manuscript on: {topic}...")
+
+    system_prompt = _system_prompt(topic)
 
     try:
         response = client.responses.parse(
@@ -57,4 +73,63 @@ def generate_manuscript(topic: str) -> Manuscript | None:
         return response.output_parsed
     except Exception as e:
         print(f"An error occurred while generating the manuscript: {e}")
-        return None
\ No newline at end of file
+        return None
+
+async def generate_manuscripts_async(topic: str, count: int = 1) -> List[Manuscript]:
+    """
+    Generates `count` manuscripts about a topic in a single call.
+
+    Returns:
+        The generated manuscripts, or an empty list if the call failed.
+    """
+    if not async_client:
+        print("OpenAI client not initialized.")
+        return []
+
+    print(f"\nAsking OpenAI to generate {count} manuscript(s) on: {topic}...")
+    try:
+        response = await async_client.responses.parse(
+            model="gpt-4o",
+            input=[
+                {"role": "system", "content": _system_prompt(topic, count)},
+            ],
+            text_format=Manuscripts
+        )
+        manuscripts = response.output_parsed.manuscripts[:count]
+        print(f"Successfully generated {len(manuscripts)} manuscript(s) on: {topic}.")
+        return manuscripts
+    except Exception as e:
+        print(f"An error occurred while generating manuscripts on {topic}: {e}")
+        return []
+
+
+async def generate_manuscript_batch(
+    topics: List[str], per_topic: int = 1, per_call: int = 5, max_concurrency: int = 4
+) -> dict[str, List[Manuscript]]:
+    """
+    Generates `per_topic` manuscripts for every topic concurrently.
+
+    Each call asks for up to `per_call` manuscripts, and at most `max_concurrency`
+    calls run at once to stay within rate limits.
+
+    Returns:
+        Topic to generated manuscripts. A topic can get fewer than `per_topic` if calls failed.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def limited(topic: str, count: int) -> tuple[str, List[Manuscript]]:
+        async with semaphore:
+            return topic, await generate_manuscripts_async(topic, count)
+
+    calls = []
+    for topic in topics:
+        remaining = per_topic
+        while remaining > 0:
+            count = min(per_call, remaining)
+            calls.append(limited(topic, count))
+            remaining -= count
+
+    results: dict[str, List[Manuscript]] = {topic: [] for topic in topics}
+    for topic, manuscripts in await asyncio.gather(*calls):
+        results[topic].extend(manuscripts)
+    return results
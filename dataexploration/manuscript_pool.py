@@ -0,0 +1,139 @@
+import os
+import asyncio
+import argparse
+import datetime
+from typing import List
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal, ManuscriptRecord, init_db
+from .manuscript import Manuscript, generate_manuscript_batch
+
+# --- Pre-generated manuscript pool ---
+# /manuscript serves the oldest unserved manuscript for a topic and then tops the
+# topic up in the background once fewer than LOW_WATER_MARK are left. Topics in
+# MANUSCRIPT_POOL_TOPICS (comma-separated) are filled on startup. Other topics
+# only get a pool through bulk generation; a topic typed once is generated live.
+
+LOW_WATER_MARK = int(os.getenv("MANUSCRIPT_POOL_LOW_WATER", "3"))
+HIGH_WATER_MARK = int(os.getenv("MANUSCRIPT_POOL_HIGH_WATER", "10"))
+POOL_TOPICS = [t.strip() for t in os.getenv("MANUSCRIPT_POOL_TOPICS", "").split(",") if t.strip()]
+
+# Topics with a refill in flight in this process, so concurrent requests don't start duplicates
+_refilling: set[str] = set()
+
+
+def topic_key(topic: str) -> str:
+    """Normalizes a topic so 'Sepsis', ' sepsis ' and 'SEPSIS' share a pool."""
+    return " ".join(topic.lower().split())
+
+
+def manuscript_dict(record: ManuscriptRecord) -> dict:
+    return {"title": record.title, "prose": record.prose, "key_takeaways": record.key_takeaways}
+
+
+async def store_manuscripts(db: AsyncSession, topic: str, manuscripts: List[Manuscript]) -> None:
+    """Adds generated manuscripts to the pool. The caller commits."""
+    for manuscript in manuscripts:
+        db.add(ManuscriptRecord(
+            topic=topic,
+            topic_key=topic_key(topic),
+            title=manuscript.title,
+            prose=manuscript.prose,
+            key_takeaways=manuscript.key_takeaways,
+        ))
+
+
+async def pool_size(db: AsyncSession, topic: str) -> int:
+    result = await db.execute(
+        select(func.count()).select_from(ManuscriptRecord).where(
+            ManuscriptRecord.topic_key == topic_key(topic), ManuscriptRecord.served_at.is_(None)
+        )
+    )
+    return result.scalar_one()
+
+
+async def has_pool(db: AsyncSession, topic: str) -> bool:
+    """True if the topic is configured for pooling or has ever had manuscripts stored."""
+    if topic_key(topic) in {topic_key(t) for t in POOL_TOPICS}:
+        return True
+    result = await db.execute(
+        select(ManuscriptRecord.id).where(ManuscriptRecord.topic_key == topic_key(topic)).limit(1)
+    )
+    return result.first() is not None
+
+
+async def take_from_pool(db: AsyncSession, topic: str) -> ManuscriptRecord | None:
+    """
+    Claims the oldest unserved manuscript for a topic and marks it served.
+
+    SKIP LOCKED lets concurrent requests claim different rows without waiting on each other.
+    """
+    result = await db.execute(
+        select(ManuscriptRecord)
+        .where(ManuscriptRecord.topic_key == topic_key(topic), ManuscriptRecord.served_at.is_(None))
+        .order_by(ManuscriptRecord.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    record = result.scalar_one_or_none()
+    if record:
+        record.served_at = datetime.datetime.utcnow()
+        await db.commit()
+    return record
+
+
+async def refill_if_low(topic: str) -> None:
+    """Tops a topic's pool up to HIGH_WATER_MARK if it has dropped below LOW_WATER_MARK."""
+    key = topic_key(topic)
+    if key in _refilling:
+        return
+    _refilling.add(key)
+    try:
+        # Separate sessions, so no connection is held while the manuscripts are generated
+        async with AsyncSessionLocal() as session:
+            available = await pool_size(session, topic)
+        if available >= LOW_WATER_MARK:
+            return
+        missing = HIGH_WATER_MARK - available
+        print(f"Refilling manuscript pool for '{topic}' with {missing} manuscript(s)...")
+        generated = await generate_manuscript_batch([topic], per_topic=missing)
+        async with AsyncSessionLocal() as session:
+            await store_manuscripts(session, topic, generated[topic])
+            await session.commit()
+    finally:
+        _refilling.discard(key)
+
+
+async def refill_pools(topics: List[str]) -> None:
+    await asyncio.gather(*(refill_if_low(topic) for topic in topics))
+
+
+async def generate_and_store(topics: List[str], per_topic: int, max_concurrency: int = 4) -> dict[str, int]:
+    """Bulk-generates manuscripts for a topic list and stores them. Returns the number stored per topic."""
+    generated = await generate_manuscript_batch(topics, per_topic=per_topic, max_concurrency=max_concurrency)
+    async with AsyncSessionLocal() as session:
+        for topic, manuscripts in generated.items():
+            await store_manuscripts(session, topic, manuscripts)
+        await session.commit()
+    return {topic: len(manuscripts) for topic, manuscripts in generated.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-generate manuscripts into the manuscripts table.")
+    parser.add_argument("--topics-file", required=True, help="Text file with one topic per line")
+    parser.add_argument("--per-topic", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with open(args.topics_file, encoding="utf-8") as f:
+        topics = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    async def main():
+        await init_db()
+        counts = await generate_and_store(topics, args.per_topic, args.concurrency)
+        for topic, count in counts.items():
+            print(f"{topic}: {count} manuscript(s) stored")
+
+    asyncio.run(main())
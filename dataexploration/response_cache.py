@@ -0,0 +1,92 @@
+import gzip
+import json
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# --- Conditional GET and serialized-response cache ---
+# Transcript rows carry a version that a trigger bumps on every update (see
+# database.MIGRATIONS), so "<id>-<version>" identifies the content. Bodies of
+# finished jobs are kept here already serialized and gzipped, keyed by that
+# tag, so repeated views skip both serialization and compression. An edit
+# bumps the version, and the old entry is simply never asked for again and
+# ages out of the LRU.
+#
+# Gzip and identity bodies are different representations and must not share a
+# strong ETag, so clients that accept gzip get the tag with a "-gz" suffix.
+
+# Statuses after which only user edits (which bump the version) change a row
+FINISHED_STATUSES = {"completed", "failed_conversion", "rejected_silent"}
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "")
+
+
+def representation_etag(request: Request, etag: str) -> str:
+    """The ETag sent to this client: the content tag, suffixed for gzip-capable clients."""
+    return etag[:-1] + '-gz"' if accepts_gzip(request) else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Checks If-None-Match, which uses the weak comparison (RFC 9110, 13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+
+
+class SerializedBody:
+    """A JSON body serialized once, with a gzipped copy for clients that accept it."""
+
+    def __init__(self, payload):
+        self.raw = json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzipped = gzip.compress(self.raw, compresslevel=6) if len(self.raw) >= GZIP_MIN_SIZE else None
+
+    @property
+    def size(self) -> int:
+        return len(self.raw) + (len(self.gzipped) if self.gzipped else 0)
+
+    def response(self, request: Request, etag: str) -> Response:
+        """Builds the response; `etag` should come from representation_etag."""
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if self.gzipped and accepts_gzip(request):
+            # GZipMiddleware passes responses that already have a Content-Encoding through untouched
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzipped, media_type="application/json", headers=headers)
+        return Response(self.raw, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """A least-recently-used cache of serialized bodies, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, SerializedBody] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, etag: str) -> SerializedBody | None:
+        body = self._entries.get(etag)
+        if body is not None:
+            self._entries.move_to_end(etag)
+        return body
+
+    def put(self, etag: str, body: SerializedBody):
+        if body.size > self.max_bytes or etag in self._entries:
+            return
+        self._entries[etag] = body
+        self._bytes += body.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
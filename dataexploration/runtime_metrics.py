@@ -0,0 +1,86 @@
+import asyncio
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# --- Runtime metrics for benchmarking ---
+# Only enabled when the server runs with BENCHMARK_METRICS=1 (see benchmarks/).
+
+
+def percentiles(values: list[float], points=(50, 95, 99)) -> dict[str, float | None]:
+    """Nearest-rank percentiles, e.g. {'p50': ..., 'p95': ..., 'p99': ...}."""
+    if not values:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(values)
+    result = {}
+    for p in points:
+        rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+        result[f"p{p}"] = ordered[rank]
+    return result
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task that sleeps for a fixed interval."""
+
+    def __init__(self, interval: float = 0.05, max_samples: int = 100_000):
+        self.interval = interval
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        values = list(self.samples)
+        return {"samples": len(values), "max_ms": max(values, default=None), **percentiles(values)}
+
+
+class PoolMonitor:
+    """Tracks how many database connections are checked out, including the peak."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.pool = engine.sync_engine.pool
+        self.checked_out = 0
+        self.peak = 0
+        self.checkouts = 0
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, *args):
+        self.checked_out += 1
+        self.checkouts += 1
+        self.peak = max(self.peak, self.checked_out)
+
+    def _on_checkin(self, *args):
+        self.checked_out -= 1
+
+    def reset(self):
+        self.peak = self.checked_out
+        self.checkouts = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak,
+            "checkouts": self.checkouts,
+            "pool_size": self.pool.size() if hasattr(self.pool, "size") else None,
+            "overflow": self.pool.overflow() if hasattr(self.pool, "overflow") else None,
+        }
@@ -0,0 +1,126 @@
+from bisect import bisect_left
+
+# --- Columnar segment layout ---
+# A transcript's timing information is stored as parallel arrays instead of a
+# list of dicts per segment/word. All times are integer milliseconds and all
+# offsets are character offsets into `text`.
+#
+#   text              the full transcript text (segments joined by a space)
+#   segment_offsets   start offset of each segment in `text`, plus a final end offset (len n + 1)
+#   segment_starts    start time of each segment
+#   segment_ends      end time of each segment
+#   segment_speakers  index into `speakers` for each segment, or -1 if unknown
+#   speakers          distinct speaker labels, in order of first appearance
+#   word_offsets      start offset of each word in `text`, plus a final end offset (len m + 1)
+#   word_starts       start time of each word
+#   word_ends         end time of each word
+
+
+def empty_segments(text: str = "") -> dict:
+    """Returns a columnar structure holding only text and no timings."""
+    return {
+        "text": text,
+        "segment_offsets": [0],
+        "segment_starts": [],
+        "segment_ends": [],
+        "segment_speakers": [],
+        "speakers": [],
+        "word_offsets": [0],
+        "word_starts": [],
+        "word_ends": [],
+    }
+
+
+def build_segments(segments: list[dict], words: list[dict] | None = None) -> dict:
+    """
+    Packs provider segments into the columnar layout.
+
+    Args:
+        segments: Dicts with 'text', 'start_ms', 'end_ms' and an optional 'speaker'.
+        words: Optional dicts with 'text', 'start_ms' and 'end_ms', in spoken order.
+
+    Returns:
+        The columnar structure described at the top of this module.
+    """
+    result = empty_segments()
+    speaker_index: dict[str, int] = {}
+    parts = []
+    starts = []
+    offset = 0
+
+    for segment in segments:
+        text = segment["text"].strip()
+        if not text:
+            continue
+        if parts:
+            offset += 1  # joining space
+        starts.append(offset)
+        parts.append(text)
+        offset += len(text)
+
+        speaker = segment.get("speaker")
+        if speaker is None:
+            result["segment_speakers"].append(-1)
+        else:
+            speaker = str(speaker)
+            if speaker not in speaker_index:
+                speaker_index[speaker] = len(result["speakers"])
+                result["speakers"].append(speaker)
+            result["segment_speakers"].append(speaker_index[speaker])
+
+        result["segment_starts"].append(int(segment["start_ms"]))
+        result["segment_ends"].append(int(segment["end_ms"]))
+
+    result["text"] = " ".join(parts)
+    result["segment_offsets"] = starts + [offset]
+
+    if words:
+        _attach_words(result, words)
+    return result
+
+
+def _attach_words(result: dict, words: list[dict]) -> None:
+    """Locates each word in the transcript text and records its offset and timing."""
+    text = result["text"]
+    offsets = []
+    cursor = 0
+    for word in words:
+        token = word["text"].strip()
+        if not token:
+            continue
+        position = text.find(token, cursor)
+        if position == -1:
+            # Word-level and segment-level text can disagree on punctuation; skip those words.
+            continue
+        offsets.append(position)
+        result["word_starts"].append(int(word["start_ms"]))
+        result["word_ends"].append(int(word["end_ms"]))
+        cursor = position + len(token)
+    result["word_offsets"] = offsets + [len(text)]
+
+
+def segment_at(data: dict, index: int) -> dict:
+    """Unpacks a single segment into a plain dict."""
+    offsets = data["segment_offsets"]
+    speaker = data["segment_speakers"][index]
+    return {
+        "index": index,
+        "start_ms": data["segment_starts"][index],
+        "end_ms": data["segment_ends"][index],
+        "speaker": data["speakers"][speaker] if speaker >= 0 else None,
+        "text": data["text"][offsets[index]:offsets[index + 1]].strip(),
+    }
+
+
+def query_time_range(data: dict, start_ms: int, end_ms: int) -> list[dict]:
+    """
+    Returns the segments overlapping the half-open interval [start_ms, end_ms).
+
+    Segments are ordered by start time, so segments starting after the range
+    are cut off with a binary search. Diarized segments can overlap, so their
+    end times are not sorted and the remaining candidates are filtered by end.
+    """
+    starts = data.get("segment_starts", [])
+    ends = data.get("segment_ends", [])
+    last = bisect_left(starts, end_ms)
+    return [segment_at(data, i) for i in range(last) if ends[i] > start_ms]
@@ -0,0 +1,147 @@
+import uuid
+
+# Fields of a sentence that count as content. Bookkeeping fields such as `id`
+# and `dirty` are left out so they never show up as edits.
+SENTENCE_FIELDS = [
+    "text",
+    "is_uncertain",
+    "has_medical_terminology",
+    "specific_uncertain_word",
+    "best_model_for_medical_terminology",
+    "best_everyday_speech",
+]
+
+
+def new_sentence_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def assign_sentence_ids(sentences: list[dict]) -> list[dict]:
+    """Gives every sentence without an id a new stable id. Existing ids are kept."""
+    for sentence in sentences:
+        if not sentence.get("id"):
+            sentence["id"] = new_sentence_id()
+    return sentences
+
+
+def diff_sentences(old: list[dict], new: list[dict]) -> list[dict]:
+    """
+    Compares two versions of a sentence list by sentence id.
+
+    Returns:
+        A list of changes, each with 'op' ('insert', 'update' or 'delete'),
+        'sentence_id', and 'before'/'after' holding only the changed fields.
+    """
+    old_by_id = {s["id"]: s for s in old if s.get("id")}
+    new_ids = set()
+    changes = []
+
+    for sentence in new:
+        sentence_id = sentence["id"]
+        new_ids.add(sentence_id)
+        previous = old_by_id.get(sentence_id)
+        if previous is None:
+            after = {f: sentence.get(f) for f in SENTENCE_FIELDS}
+            changes.append({"op": "insert", "sentence_id": sentence_id, "before": None, "after": after})
+            continue
+        changed = [f for f in SENTENCE_FIELDS if previous.get(f) != sentence.get(f)]
+        if changed:
+            changes.append({
+                "op": "update",
+                "sentence_id": sentence_id,
+                "before": {f: previous.get(f) for f in changed},
+                "after": {f: sentence.get(f) for f in changed},
+            })
+
+    for sentence_id, previous in old_by_id.items():
+        if sentence_id not in new_ids:
+            before = {f: previous.get(f) for f in SENTENCE_FIELDS}
+            changes.append({"op": "delete", "sentence_id": sentence_id, "before": before, "after": None})
+
+    return changes
+
+
+def mark_dirty(sentences: list[dict], changes: list[dict]) -> None:
+    """Flags sentences touched by an edit so the next refinement pass revisits them."""
+    touched = {c["sentence_id"] for c in changes if c["op"] in ("insert", "update")}
+    for sentence in sentences:
+        if sentence["id"] in touched:
+            sentence["dirty"] = True
+
+
+def select_for_refinement(sentences: list[dict], context: int = 1) -> tuple[list[int], list[int]]:
+    """
+    Picks the sentences that need another improvement pass.
+
+    A sentence is a target if it is dirty or marked uncertain. Up to `context`
+    neighbours on each side are included as read-only context.
+
+    Returns:
+        (target indices, context indices), both sorted.
+    """
+    targets = [i for i, s in enumerate(sentences) if s.get("dirty") or s.get("is_uncertain")]
+    target_set = set(targets)
+    context_set = set()
+    for i in targets:
+        for j in range(max(0, i - context), min(len(sentences), i + context + 1)):
+            if j not in target_set:
+                context_set.add(j)
+    return targets, sorted(context_set)
+
+
+def _word_slice(text: str, start: float, end: float) -> str:
+    """Slices `text` between two character positions, widened to whole words."""
+    lo = max(int(start), 0)
+    hi = min(int(end), len(text))
+    lo = text.rfind(" ", 0, lo) + 1
+    hi = text.find(" ", hi)
+    return text[lo:hi if hi != -1 else len(text)].strip()
+
+
+def source_excerpts(sentences: list[dict], indices: list[int], whisper_text: str, corti_text: str,
+                    padding_chars: int = 80, padding_ratio: float = 0.25) -> list[dict]:
+    """
+    Finds the stretches of the two source transcripts that the given sentences were made from.
+
+    The improved sentences carry no timings, so each run of consecutive sentences is
+    located by its relative character position in the improved text, widened on
+    each side by `padding_chars` plus `padding_ratio` times the run's own length,
+    and the same stretch is cut from both sources. Overlapping windows are merged.
+    The excerpts grow with the number of selected sentences, not with the length
+    of the transcript.
+
+    Returns:
+        Dicts with 'whisper' and 'corti' excerpts, in transcript order.
+    """
+    if not indices:
+        return []
+    bounds = [0]
+    for sentence in sentences:
+        bounds.append(bounds[-1] + len(sentence.get("text", "")) + 1)
+    total = max(bounds[-1], 1)
+
+    windows = []
+    run_start = previous = indices[0]
+    for i in indices[1:] + [None]:
+        if i is not None and i == previous + 1:
+            previous = i
+            continue
+        start, end = bounds[run_start], bounds[previous + 1]
+        pad = padding_chars + padding_ratio * (end - start)
+        start, end = start - pad, end + pad
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = end
+        else:
+            windows.append([start, end])
+        if i is not None:
+            run_start = previous = i
+
+    excerpts = []
+    for start, end in windows:
+        excerpt = {}
+        for source, text in (("whisper", whisper_text or ""), ("corti", corti_text or "")):
+            # Sources differ in length from the improved text, so positions are scaled
+            scale = len(text) / total
+            excerpt[source] = _word_slice(text, start * scale, end * scale)
+        excerpts.append(excerpt)
+    return excerpts
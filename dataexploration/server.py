@@ -1,38 +1,75 @@
 import os
+import copy
+import asyncio
 import shutil
 import uuid
+import hashlib
+import datetime
 from dotenv import load_dotenv
 
 # Load environment variables from .env file BEFORE other imports
 load_dotenv()
 
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, BackgroundTasks, Query, Request
 from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, literal, literal_column, or_, String
 import contextlib
 from pydub import AudioSegment # <-- Import pydub
 
 # Import DB and transcription functions using relative imports
-from .database import get_db, init_db, Transcript, AsyncSessionLocal
+from .database import (
+    get_db, init_db, engine, Transcript, TranscriptEdit, TranscriptTerm, ManuscriptRecord, AsyncSessionLocal, TS_CONFIG
+)
 from .get_corti_bearer_token import get_access_token
 from .corti_create_new_interaction import create_corti_interaction
 from .create_upload_recording import upload_recording
 from .create_transcript import create_transcript
 from .create_whisper_transcript import transcribe_with_whisper
-from .transcript_improver import improve_transcript_with_gpt
-from .manuscript import generate_manuscript
+from .transcript_improver import improve_transcript_with_gpt, refine_sentences_with_gpt
+from .manuscript import generate_manuscripts_async
+from .manuscript_pool import (
+    POOL_TOPICS, has_pool, take_from_pool, refill_if_low, refill_pools, generate_and_store, manuscript_dict, topic_key
+)
+from .segments import query_time_range
+from .audio_preprocessing import preprocess_audio, remap_segments
+from .sentence_versions import assign_sentence_ids, diff_sentences, mark_dirty, select_for_refinement, source_excerpts
+from .terminology import get_term_index, compare_sources
+from .transcript_terms import improved_text, index_transcript_terms
+from .runtime_metrics import LoopLagMonitor, PoolMonitor
+from .response_cache import (
+    ResponseCache, SerializedBody, FINISHED_STATUSES, GZIP_MIN_SIZE, etag_matches, not_modified, representation_etag
+)
+
+# Event-loop lag and DB pool metrics for the benchmark suite (benchmarks/run.py)
+BENCHMARK_METRICS = os.getenv("BENCHMARK_METRICS") == "1"
+loop_lag_monitor = LoopLagMonitor() if BENCHMARK_METRICS else None
+pool_monitor = PoolMonitor(engine) if BENCHMARK_METRICS else None
 
 # --- App Setup ---
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
-    # On startup, initialize the database
+    # On startup, initialize the database and map the terminology index
     await init_db()
+    get_term_index()
+    if loop_lag_monitor:
+        loop_lag_monitor.start()
+    # Pre-warm the manuscript pool without delaying startup
+    prewarm = asyncio.create_task(refill_pools(POOL_TOPICS)) if POOL_TOPICS else None
     yield
+    if prewarm:
+        prewarm.cancel()
+    if loop_lag_monitor:
+        await loop_lag_monitor.stop()
 
 app = FastAPI(lifespan=lifespan)
+# Compresses large JSON bodies; cached bodies below are gzipped ahead of time and passed through
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+
+response_cache = ResponseCache()
 
 # --- Define absolute paths for directories ---
 # Get the directory where this server.py file is located
@@ -47,33 +84,46 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 
 # --- Background Transcription Task ---
+async def set_transcript_status(transcript_id: uuid.UUID, status: str, **fields):
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(Transcript).where(Transcript.id == transcript_id))
+        db_transcript = result.scalar_one_or_none()
+        if db_transcript:
+            db_transcript.status = status
+            for name, value in fields.items():
+                setattr(db_transcript, name, value)
+            await session.commit()
+
 async def process_transcription_task(transcript_id: uuid.UUID, temp_file_path: str, db: AsyncSession):
     """The actual transcription logic that runs in the background."""
     
-    # --- Convert audio to a standard WAV format ---
+    # --- Convert audio to a trimmed, normalized mono WAV ---
     converted_file_path = temp_file_path + ".wav"
     try:
         print(f"Converting {temp_file_path} to WAV format...")
         audio = AudioSegment.from_file(temp_file_path)
-        audio.export(converted_file_path, format="wav")
-        print("Conversion successful.")
+        preprocessed = preprocess_audio(audio)
+        if not preprocessed["rejected"]:
+            preprocessed["audio"].export(converted_file_path, format="wav")
+        print(f"Conversion successful ({preprocessed['original_ms']} ms -> {preprocessed['processed_ms']} ms).")
     except Exception as e:
         print(f"Error during audio conversion: {e}")
         # Clean up and update DB with error status
         os.remove(temp_file_path)
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(select(Transcript).where(Transcript.id == transcript_id))
-            db_transcript = result.scalar_one_or_none()
-            if db_transcript:
-                db_transcript.status = "failed_conversion"
-                await session.commit()
+        await set_transcript_status(transcript_id, "failed_conversion")
+        return
+
+    # Near-silent or empty recordings are not worth sending to the providers
+    if preprocessed["rejected"]:
+        print(f"Rejected {temp_file_path}: no speech detected.")
+        await set_transcript_status(transcript_id, "rejected_silent", audio_duration_ms=preprocessed["original_ms"])
         return
 
     # --- Run Whisper Transcription (on the converted file) ---
     whisper_result = transcribe_with_whisper(converted_file_path)
 
     # --- Run Corti Transcription Workflow (on the converted file) ---
-    corti_result = "[Corti transcription failed]"
+    corti_result = None
     token = get_access_token()
     if token:
         interaction_id = create_corti_interaction(token)
@@ -82,14 +132,29 @@ async def process_transcription_task(transcript_id: uuid.UUID, temp_file_path: s
             if recording_id:
                 corti_result = create_transcript(token, interaction_id, recording_id)
 
+    # Provider timestamps refer to the trimmed audio; store them on the original timeline
+    offset_map = preprocessed["offset_map"]
+    whisper_result = remap_segments(whisper_result, offset_map)
+    corti_result = remap_segments(corti_result, offset_map)
+
     # --- Update the database with results ---
     async with AsyncSessionLocal() as session:
         result = await session.execute(select(Transcript).where(Transcript.id == transcript_id))
         db_transcript = result.scalar_one_or_none()
         if db_transcript:
-            db_transcript.whisper_transcript = whisper_result
-            db_transcript.corti_transcript = corti_result
+            db_transcript.whisper_transcript = whisper_result["text"] if whisper_result else None
+            db_transcript.whisper_segments = whisper_result
+            db_transcript.corti_transcript = corti_result["text"] if corti_result else "[Corti transcription failed]"
+            db_transcript.corti_segments = corti_result
+            db_transcript.audio_offset_map = offset_map
+            db_transcript.audio_duration_ms = preprocessed["original_ms"]
+            db_transcript.processed_duration_ms = preprocessed["processed_ms"]
             db_transcript.status = "completed"
+            db_transcript.completed_at = datetime.datetime.utcnow()
+            await index_transcript_terms(session, transcript_id, {
+                "whisper": db_transcript.whisper_transcript,
+                "corti": db_transcript.corti_transcript,
+            })
             await session.commit()
 
     # Clean up the temporary files - DISABLED FOR DEBUGGING
@@ -115,7 +180,7 @@ async def create_transcription_job(
     with open(temp_file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
-    new_transcript = Transcript(original_filename=file.filename)
+    new_transcript = Transcript(original_filename=file.filename, audio_path=temp_file_name)
     db.add(new_transcript)
     await db.commit()
     await db.refresh(new_transcript)
@@ -124,64 +189,387 @@ async def create_transcription_job(
     return {"transcript_id": new_transcript.id, "status": new_transcript.status}
 
 @app.get("/transcripts")
-async def get_all_transcripts(db: AsyncSession = Depends(get_db)):
-    """Returns a list of all transcription jobs."""
-    result = await db.execute(select(Transcript).order_by(Transcript.created_at.desc()))
-    return result.scalars().all()
+async def get_all_transcripts(request: Request, db: AsyncSession = Depends(get_db)):
+    """Returns a list of all transcription jobs. Supports If-None-Match."""
+    # Any insert changes the count and any update bumps a version, so this fingerprints the list
+    result = await db.execute(
+        select(func.count(), func.coalesce(func.sum(Transcript.version), 0), func.max(Transcript.updated_at))
+    )
+    count, version_sum, last_update = result.one()
+    fingerprint = hashlib.sha1(f"{count}:{version_sum}:{last_update}".encode()).hexdigest()[:20]
+    content_etag = f'"list-{fingerprint}"'
+    etag = representation_etag(request, content_etag)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = response_cache.get(content_etag)
+    if body is None:
+        result = await db.execute(select(Transcript).order_by(Transcript.created_at.desc()))
+        body = SerializedBody(result.scalars().all())
+        response_cache.put(content_etag, body)
+    return body.response(request, etag)
+
+# Declared before /transcripts/{transcript_id} so "search" is not parsed as an id
+@app.get("/transcripts/search")
+async def search_transcripts(
+    q: str = Query(..., min_length=2),
+    mode: str = Query("fulltext", pattern="^(fulltext|fuzzy)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Searches the Whisper, Corti and improved text of all transcripts.
+
+    `fulltext` matches stemmed words against the GIN-indexed search_vector (supports
+    "quoted phrases", OR and -exclusions). `fuzzy` matches misspelled terms by trigram
+    word similarity. Both return one page of results with a highlighted snippet.
+    """
+    config = literal_column(f"'{TS_CONFIG}'::regconfig")
+    if mode == "fulltext":
+        query = func.websearch_to_tsquery(config, q)
+        score = func.ts_rank_cd(Transcript.search_vector, query)
+        condition = Transcript.search_vector.op("@@")(query)
+    else:
+        query = func.plainto_tsquery(config, q)
+        columns = [Transcript.improved_text, Transcript.corti_transcript, Transcript.whisper_transcript]
+        score = func.greatest(*[func.word_similarity(q, c) for c in columns])
+        # `<%` is the pg_trgm word-similarity operator served by the trigram indexes
+        condition = or_(*[literal(q, String).op("<%")(c) for c in columns])
+
+    # Rank and paginate first, so snippets are only built for the rows on this page
+    ranked = (
+        select(Transcript.id, score.label("score"))
+        .where(condition)
+        .order_by(score.desc(), Transcript.created_at.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size + 1)
+        .subquery()
+    )
+    document = func.coalesce(
+        func.nullif(Transcript.improved_text, ""), Transcript.corti_transcript, Transcript.whisper_transcript, ""
+    )
+    snippet = func.ts_headline(
+        config, document, query,
+        "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+    )
+    result = await db.execute(
+        select(
+            Transcript.id,
+            Transcript.original_filename,
+            Transcript.status,
+            Transcript.created_at,
+            ranked.c.score,
+            snippet.label("snippet"),
+        )
+        .join(ranked, ranked.c.id == Transcript.id)
+        .order_by(ranked.c.score.desc(), Transcript.created_at.desc())
+    )
+    rows = [row._asdict() for row in result.all()]
+    return {
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(rows) > page_size,
+        "results": rows[:page_size],
+    }
 
 @app.get("/transcripts/{transcript_id}")
-async def get_transcript_details(transcript_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
-    """Returns the details and status of a single transcription job."""
-    result = await db.execute(select(Transcript).where(Transcript.id == transcript_id))
-    transcript = result.scalar_one_or_none()
-    if not transcript:
+async def get_transcript_details(transcript_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db)):
+    """Returns the details and status of a single transcription job. Supports If-None-Match."""
+    # Check the version first so an unchanged row never loads its large text columns
+    result = await db.execute(select(Transcript.version, Transcript.status).where(Transcript.id == transcript_id))
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    content_etag = f'"{transcript_id}-{row.version}"'
+    etag = representation_etag(request, content_etag)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = response_cache.get(content_etag)
+    if body is None:
+        result = await db.execute(select(Transcript).where(Transcript.id == transcript_id))
+        transcript = result.scalar_one_or_none()
+        if not transcript:
+            raise HTTPException(status_code=404, detail="Transcript not found")
+        body = SerializedBody(transcript)
+        # Rows still processing change soon; only finished ones are worth keeping
+        if transcript.status in FINISHED_STATUSES:
+            response_cache.put(content_etag, body)
+    return body.response(request, etag)
+
+@app.get("/transcripts/{transcript_id}/segments")
+async def get_transcript_segments(
+    transcript_id: uuid.UUID,
+    source: str = Query("corti", pattern="^(whisper|corti)$"),
+    start_ms: int = Query(0, ge=0),
+    end_ms: int | None = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """Returns the timed, speaker-labelled segments overlapping [start_ms, end_ms)."""
+    column = Transcript.whisper_segments if source == "whisper" else Transcript.corti_segments
+    result = await db.execute(select(column).where(Transcript.id == transcript_id))
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Transcript not found")
-    return transcript
+
+    data = row[0]
+    if not data:
+        return {"source": source, "segments": []}
+    if end_ms is None:
+        end_ms = max(data["segment_ends"], default=-1) + 1
+    return {"source": source, "segments": query_time_range(data, start_ms, end_ms)}
 
 class ImprovedTranscriptUpdate(BaseModel):
     improved_transcript: dict
 
+def store_improved_sentences(
+    db: AsyncSession, db_transcript: Transcript, sentences: list[dict], source: str
+) -> dict:
+    """
+    Saves a new version of the improved transcript and records the sentence-level diff.
+
+    The caller is responsible for committing the session.
+    """
+    previous = db_transcript.improved_transcript or {}
+    old_sentences = previous.get("sentences", [])
+    assign_sentence_ids(sentences)
+    changes = diff_sentences(old_sentences, sentences)
+    # Only edits on top of an existing version are dirty; a first save is the baseline.
+    if source == "user" and old_sentences:
+        mark_dirty(sentences, changes)
+
+    version = previous.get("version", 0) + 1
+    # Assign a new dict so SQLAlchemy sees the JSON column as changed
+    db_transcript.improved_transcript = {"version": version, "sentences": sentences}
+    if changes:
+        db.add(TranscriptEdit(transcript_id=db_transcript.id, version=version, source=source, changes=changes))
+    return db_transcript.improved_transcript
+
+async def get_transcript_or_404(db: AsyncSession, transcript_id: uuid.UUID, for_update: bool = False) -> Transcript:
+    query = select(Transcript).where(Transcript.id == transcript_id)
+    if for_update:
+        # Serializes writers of the improved transcript until the caller commits
+        query = query.with_for_update()
+    result = await db.execute(query)
+    db_transcript = result.scalar_one_or_none()
+    if not db_transcript:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    return db_transcript
+
 @app.put("/transcripts/{transcript_id}")
 async def save_improved_transcript(
     transcript_id: uuid.UUID,
     update_data: ImprovedTranscriptUpdate,
     db: AsyncSession = Depends(get_db)
 ):
-    """Saves the user-edited improved transcript to the database."""
-    result = await db.execute(select(Transcript).where(Transcript.id == transcript_id))
-    db_transcript = result.scalar_one_or_none()
-    if not db_transcript:
-        raise HTTPException(status_code=404, detail="Transcript not found")
-    
-    db_transcript.improved_transcript = update_data.improved_transcript
+    """
+    Saves the user-edited improved transcript as a new version, storing the per-sentence diff.
+
+    If the body carries the `version` it was based on and the stored transcript has moved
+    on since (e.g. a refine pass finished meanwhile), nothing is saved and 409 is returned.
+    """
+    db_transcript = await get_transcript_or_404(db, transcript_id, for_update=True)
+    previous = db_transcript.improved_transcript or {}
+    base_version = update_data.improved_transcript.get("version")
+    if base_version is not None and base_version != previous.get("version", 0):
+        raise HTTPException(status_code=409, detail="Transcript was changed meanwhile; reload it and edit again")
+
+    sentences = copy.deepcopy(update_data.improved_transcript.get("sentences", []))
+    # Keep sentences that are still waiting for a refinement pass dirty
+    still_dirty = {s.get("id") for s in previous.get("sentences", []) if s.get("dirty")}
+    for sentence in sentences:
+        if sentence.get("id") in still_dirty:
+            sentence["dirty"] = True
+
+    improved = store_improved_sentences(db, db_transcript, sentences, source="user")
+    await index_transcript_terms(db, transcript_id, {"improved": improved_text(improved)})
+    await db.commit()
+    return {"message": "Transcript updated successfully", "improved_transcript": improved}
+
+@app.get("/transcripts/{transcript_id}/edits")
+async def get_transcript_edits(transcript_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    """Returns the sentence-level edit history of the improved transcript, oldest first."""
+    result = await db.execute(
+        select(TranscriptEdit)
+        .where(TranscriptEdit.transcript_id == transcript_id)
+        .order_by(TranscriptEdit.version)
+    )
+    return result.scalars().all()
+
+@app.post("/transcripts/{transcript_id}/refine")
+async def refine_improved_transcript(
+    transcript_id: uuid.UUID,
+    context: int = Query(1, ge=0, le=5),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Re-runs the improvement only on dirty or uncertain sentences, with neighbouring sentences as context.
+
+    Returns 409 if the improved transcript was saved by someone else while the model was running.
+    """
+    db_transcript = await get_transcript_or_404(db, transcript_id)
+    if not db_transcript.improved_transcript:
+        raise HTTPException(status_code=409, detail="Transcript has not been improved yet")
+
+    base_version = db_transcript.improved_transcript.get("version", 0)
+    sentences = copy.deepcopy(db_transcript.improved_transcript.get("sentences", []))
+    assign_sentence_ids(sentences)
+    target_indices, context_indices = select_for_refinement(sentences, context=context)
+    if not target_indices:
+        return {"refined": 0, "improved_transcript": db_transcript.improved_transcript}
+
+    excerpts = source_excerpts(
+        sentences, sorted(target_indices + context_indices),
+        db_transcript.whisper_transcript, db_transcript.corti_transcript,
+    )
+    # Don't hold a transaction and pooled connection open during the model call
+    await db.rollback()
+    refined = await refine_sentences_with_gpt(
+        targets=[sentences[i] for i in target_indices],
+        context=[sentences[i] for i in context_indices],
+        excerpts=excerpts,
+    )
+    if not refined:
+        raise HTTPException(status_code=500, detail="Failed to refine transcript.")
+
+    refined_by_id = {s.id: s.dict() for s in refined.sentences}
+    for i in target_indices:
+        replacement = refined_by_id.get(sentences[i]["id"])
+        if replacement:
+            sentences[i] = replacement  # carries the same id and drops the dirty flag
+
+    db_transcript = await get_transcript_or_404(db, transcript_id, for_update=True)
+    if (db_transcript.improved_transcript or {}).get("version", 0) != base_version:
+        raise HTTPException(status_code=409, detail="Transcript was changed during refinement; refine again")
+    improved = store_improved_sentences(db, db_transcript, sentences, source="refine")
+    await index_transcript_terms(db, transcript_id, {"improved": improved_text(improved)})
     await db.commit()
-    return {"message": "Transcript updated successfully"}
+    return {"refined": len(refined_by_id), "improved_transcript": improved}
+
+# --- Medical Terminology Endpoints ---
+@app.get("/transcripts/{transcript_id}/terms")
+async def get_transcript_terms(transcript_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    """Highlights lexicon terms in the Whisper, Corti and improved text and flags where the engines disagree."""
+    db_transcript = await get_transcript_or_404(db, transcript_id)
+    return compare_sources(get_term_index(), {
+        "whisper": db_transcript.whisper_transcript,
+        "corti": db_transcript.corti_transcript,
+        "improved": improved_text(db_transcript.improved_transcript),
+    })
+
+@app.get("/terms/search")
+async def search_terms(
+    q: str = Query(..., min_length=2),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """Finds stored transcripts containing lexicon terms that start with `q` (case-insensitive)."""
+    pattern = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    result = await db.execute(
+        select(
+            TranscriptTerm.transcript_id,
+            Transcript.original_filename,
+            TranscriptTerm.term,
+            TranscriptTerm.source,
+            TranscriptTerm.count,
+        )
+        .join(Transcript, Transcript.id == TranscriptTerm.transcript_id)
+        .where(TranscriptTerm.term_key.like(pattern, escape="\\"))
+        .order_by(TranscriptTerm.term, Transcript.created_at.desc())
+        .limit(limit)
+    )
+    return [row._asdict() for row in result.all()]
 
 # --- Manuscript Generation Endpoint ---
 class ManuscriptRequest(BaseModel):
     topic: str
 
 @app.post("/manuscript")
-async def create_manuscript(request: ManuscriptRequest):
-    """Generates a medical manuscript on a given topic."""
-    manuscript_data = generate_manuscript(topic=request.topic)
-    if manuscript_data:
-        return manuscript_data.dict()
+async def create_manuscript(
+    request: ManuscriptRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """Serves a pre-generated manuscript on the topic, generating one live if the pool is empty."""
+    record = await take_from_pool(db, request.topic)
+    if record or await has_pool(db, request.topic):
+        background_tasks.add_task(refill_if_low, request.topic)
+    if record:
+        return manuscript_dict(record)
+
+    # End the transaction left open by the empty SKIP LOCKED select before the slow live call
+    await db.rollback()
+
+    manuscripts = await generate_manuscripts_async(topic=request.topic)
+    if manuscripts:
+        return manuscripts[0].dict()
     else:
         raise HTTPException(status_code=500, detail="Failed to generate manuscript.")
 
+class ManuscriptBatchRequest(BaseModel):
+    topics: list[str]
+    per_topic: int = 5
+
+@app.post("/manuscripts/batch", status_code=202)
+async def create_manuscript_batch(request: ManuscriptBatchRequest, background_tasks: BackgroundTasks):
+    """Queues bulk generation of `per_topic` manuscripts for every topic."""
+    if not request.topics or not 1 <= request.per_topic <= 100:
+        raise HTTPException(status_code=422, detail="Give at least one topic and a per_topic between 1 and 100.")
+    background_tasks.add_task(generate_and_store, request.topics, request.per_topic)
+    return {"queued": len(request.topics) * request.per_topic}
+
+@app.get("/manuscripts")
+async def list_manuscripts(
+    topic: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """Lists stored manuscripts, newest first, e.g. for building read-aloud evaluation data."""
+    query = select(ManuscriptRecord).order_by(ManuscriptRecord.created_at.desc()).limit(limit).offset(offset)
+    if topic:
+        query = query.where(ManuscriptRecord.topic_key == topic_key(topic))
+    result = await db.execute(query)
+    return result.scalars().all()
+
 # The /improve endpoint remains mostly the same, but is now just for processing, not saving.
 class TranscriptsToImprove(BaseModel):
     whisper_transcription: str
     corti_transcription: str
+    # If given, the result is stored as a new version with stable sentence ids
+    transcript_id: uuid.UUID | None = None
 
 @app.post("/improve")
-async def improve_transcripts(transcripts: TranscriptsToImprove):
-    improved_result = improve_transcript_with_gpt(
+async def improve_transcripts(transcripts: TranscriptsToImprove, db: AsyncSession = Depends(get_db)):
+    # The full pass uses the sync client; run it in a worker thread so it doesn't block the event loop
+    improved_result = await asyncio.to_thread(
+        improve_transcript_with_gpt,
         whisper_text=transcripts.whisper_transcription,
         corti_text=transcripts.corti_transcription
     )
-    if improved_result:
+    if not improved_result:
+        raise HTTPException(status_code=500, detail="Failed to generate improved transcript.")
+
+    if transcripts.transcript_id is None:
         return improved_result.dict()
-    else:
-        raise HTTPException(status_code=500, detail="Failed to generate improved transcript.")
\ No newline at end of file
+    db_transcript = await get_transcript_or_404(db, transcripts.transcript_id)
+    sentences = [s.dict() for s in improved_result.sentences]
+    # A full pass replaces every sentence, so the previous version's ids do not carry over
+    improved = store_improved_sentences(db, db_transcript, sentences, source="improve")
+    await index_transcript_terms(db, db_transcript.id, {"improved": improved_text(improved)})
+    await db.commit()
+    return improved
+
+# --- Benchmark Metrics Endpoints (only with BENCHMARK_METRICS=1) ---
+if BENCHMARK_METRICS:
+    @app.get("/debug/runtime")
+    async def get_runtime_metrics():
+        """Returns event-loop lag percentiles and database connection use since the last reset."""
+        return {"event_loop_lag": loop_lag_monitor.snapshot(), "db_pool": pool_monitor.snapshot()}
+
+    @app.post("/debug/runtime/reset")
+    async def reset_runtime_metrics():
+        loop_lag_monitor.samples.clear()
+        pool_monitor.reset()
+        return {"message": "Runtime metrics reset"}
@@ -19,8 +19,10 @@ document.addEventListener('DOMContentLoaded', () => {
     const improvedResultsElement = document.getElementById('improvedResults');
     const saveButtonContainer = document.getElementById('saveButtonContainer');
     const saveButton = document.getElementById('saveButton');
+    const refineButton = document.getElementById('refineButton');
 
     let currentTranscriptId = null;
+    let currentImprovedVersion = null; // version of the improved transcript on screen
     let pollingInterval = null;
     let manuscriptMediaRecorder;
     let manuscriptAudioChunks = [];
@@ -161,6 +163,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     improveButton.addEventListener('click', handleImprove);
     saveButton.addEventListener('click', handleSave);
+    refineButton.addEventListener('click', handleRefine);
 
     // --- Core Functions ---
     async function uploadAndStartTranscription(file) {
@@ -190,6 +193,14 @@ document.addEventListener('DOMContentLoaded', () => {
                 statusElement.textContent = 'Job loaded.';
                 displayTranscriptDetails(data);
                 await loadJobs(); // Refresh list to show completed status
+            } else if (data.status !== 'processing') {
+                // e.g. failed_conversion or rejected_silent; nothing more will happen
+                clearInterval(pollingInterval);
+                statusElement.textContent = `Job ${id} ended with status: ${data.status}`;
+                resultsElement.innerHTML = data.status === 'rejected_silent'
+                    ? '<p>No speech was detected in this recording.</p>'
+                    : `<p>Processing failed (${data.status}).</p>`;
+                await loadJobs();
             } else {
                 statusElement.textContent = `Job ${id} is still processing...`;
             }
@@ -202,11 +213,12 @@ document.addEventListener('DOMContentLoaded', () => {
     function displayTranscriptDetails(data) {
         resultsElement.innerHTML = `
             <h3>Whisper Transcription:</h3>
-            <p>${data.whisper_transcript || 'N/A'}</p>
+            <p id="whisperText">${data.whisper_transcript || 'N/A'}</p>
             <hr>
             <h3>Corti Transcription:</h3>
-            <p>${data.corti_transcript || 'N/A'}</p>
+            <p id="cortiText">${data.corti_transcript || 'N/A'}</p>
         `;
+        highlightTerms(data.id);
         improveSection.style.display = 'block';
 
         if (data.improved_transcript) {
@@ -217,6 +229,37 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    // Wraps lexicon terms in spans; terms the two engines disagree on get an extra class
+    async function highlightTerms(id) {
+        const response = await fetch(`/transcripts/${id}/terms`);
+        if (!response.ok || id !== currentTranscriptId) return;
+        const data = await response.json();
+        const disagreements = new Set(data.terms.filter(t => t.disagreement).map(t => t.term));
+
+        [['whisper', 'whisperText'], ['corti', 'cortiText']].forEach(([source, elementId]) => {
+            const element = document.getElementById(elementId);
+            // The server's offsets count code points; Array.from splits by code point, not UTF-16 unit
+            const chars = Array.from(element.textContent);
+            const slice = (start, end) => escapeHtml(chars.slice(start, end).join(''));
+            let html = '';
+            let cursor = 0;
+            const matches = [...data.annotations[source]].sort((a, b) => a.start - b.start || b.end - a.end);
+            matches.forEach(match => {
+                if (match.start < cursor) return; // skip terms nested in a longer match
+                const classes = disagreements.has(match.term) ? 'medical-term term-disagreement' : 'medical-term';
+                html += slice(cursor, match.start) + `<span class="${classes}">${slice(match.start, match.end)}</span>`;
+                cursor = match.end;
+            });
+            element.innerHTML = html + slice(cursor);
+        });
+    }
+
     async function handleImprove() {
         improvedResultsElement.innerHTML = '<div class="loader"></div><p>Asking the AI to improve the transcript...</p>';
         
@@ -229,6 +272,7 @@ document.addEventListener('DOMContentLoaded', () => {
             body: JSON.stringify({
                 whisper_transcription: transcriptData.whisper_transcript,
                 corti_transcription: transcriptData.corti_transcript,
+                transcript_id: currentTranscriptId,
             }),
         });
         const improvedData = await improveResponse.json();
@@ -236,6 +280,7 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function renderImprovedTranscript(data) {
+        currentImprovedVersion = data.version ?? null;
         let html = '<ul>';
         data.sentences.forEach(sentence => {
             let sentenceText = sentence.text;
@@ -248,6 +293,7 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             const medicalIcon = sentence.has_medical_terminology ? '<span class="medical-icon">⚕️</span>' : '';
             if (sentence.is_uncertain) liClasses.push('uncertain-sentence');
+            if (sentence.dirty) liClasses.push('dirty-sentence');
 
             // --- Create Labels ---
             const medLabel = sentence.best_model_for_medical_terminology;
@@ -260,7 +306,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 </div>
             `;
 
-            html += `<li class="${liClasses.join(' ')}">
+            html += `<li class="${liClasses.join(' ')}" data-id="${sentence.id || ''}">
                         <div class="sentence-container">
                             <div class="sentence-text" contenteditable="true">${medicalIcon}${sentenceText}</div>
                             ${labelsHtml}
@@ -277,15 +323,19 @@ document.addEventListener('DOMContentLoaded', () => {
         const sentences = [];
         editedItems.forEach(item => {
             const sentenceTextElement = item.querySelector('.sentence-text');
-            const text = sentenceTextElement.innerText.trim();
+            // Read the text without the medical icon, so unchanged sentences do not show up as edits
+            const textOnly = sentenceTextElement.cloneNode(true);
+            textOnly.querySelectorAll('.medical-icon').forEach(el => el.remove());
+            const text = textOnly.innerText.trim();
             
             // --- Read Labels Back ---
             const medLabel = item.querySelector('[data-type="med"]').dataset.value;
             const speechLabel = item.querySelector('[data-type="speech"]').dataset.value;
 
             sentences.push({
+                id: item.dataset.id || null,
                 text: text,
-                is_uncertain: sentenceTextElement.classList.contains('uncertain-sentence'),
+                is_uncertain: item.classList.contains('uncertain-sentence'),
                 has_medical_terminology: !!sentenceTextElement.querySelector('.medical-icon'),
                 specific_uncertain_word: Array.from(sentenceTextElement.querySelectorAll('.uncertain-word')).map(el => el.textContent),
                 best_model_for_medical_terminology: medLabel,
@@ -293,19 +343,46 @@ document.addEventListener('DOMContentLoaded', () => {
             });
         });
 
-        const payload = { improved_transcript: { sentences: sentences } };
+        // The version lets the server refuse a save based on an outdated transcript
+        const payload = { improved_transcript: { version: currentImprovedVersion, sentences: sentences } };
         
-        await fetch(`/transcripts/${currentTranscriptId}`, {
+        const response = await fetch(`/transcripts/${currentTranscriptId}`, {
             method: 'PUT',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload),
         });
+        const data = await response.json();
+        if (response.status === 409) {
+            statusElement.textContent = `Error: ${data.detail}`;
+            return;
+        }
+        renderImprovedTranscript(data.improved_transcript);
 
         const originalButtonText = saveButton.textContent;
         saveButton.textContent = 'Saved!';
         setTimeout(() => { saveButton.textContent = originalButtonText; }, 2000);
     }
 
+    async function handleRefine() {
+        const originalButtonText = refineButton.textContent;
+        refineButton.textContent = 'Refining...';
+        refineButton.disabled = true;
+        try {
+            const response = await fetch(`/transcripts/${currentTranscriptId}/refine`, { method: 'POST' });
+            if (!response.ok) {
+                throw new Error(`Server error: ${response.statusText}`);
+            }
+            const data = await response.json();
+            renderImprovedTranscript(data.improved_transcript);
+            statusElement.textContent = `Refined ${data.refined} sentence(s).`;
+        } catch (error) {
+            statusElement.textContent = `Error: ${error.message}`;
+        } finally {
+            refineButton.textContent = originalButtonText;
+            refineButton.disabled = false;
+        }
+    }
+
     // --- Initial Load ---
     loadJobs();
 });
\ No newline at end of file
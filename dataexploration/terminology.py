@@ -0,0 +1,276 @@
+import os
+import mmap
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+# --- Medical terminology index ---
+# An Aho-Corasick automaton over a plain-text lexicon (one term per line, '#'
+# starts a comment). The automaton is compiled once into flat 32-bit arrays and
+# written next to the lexicon, so later startups only memory-map that file.
+# If the lexicon directory is read-only, the automaton is kept in memory instead.
+# Matching is case-insensitive and only whole words are reported.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LEXICON = os.path.join(current_dir, "lexicon", "medical_terms.txt")
+
+_MAGIC = b"ACIX"
+_FORMAT_VERSION = 1
+# magic, format version, lexicon mtime_ns, lexicon size, nodes, edges, terms, blob bytes
+_HEADER = struct.Struct("<4sIQQIIII")
+
+
+def _normalize(text: str) -> str:
+    # lower() keeps the length of Danish/English text, so match offsets map 1:1
+    lowered = text.lower()
+    return lowered if len(lowered) == len(text) else text
+
+
+def read_lexicon(path: str) -> list[str]:
+    terms = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            term = line.split("#", 1)[0].strip()
+            if term and _normalize(term) not in seen:
+                seen.add(_normalize(term))
+                terms.append(term)
+    return terms
+
+
+def compile_automaton(terms: list[str]) -> dict[str, array | bytes]:
+    """
+    Builds the Aho-Corasick automaton and flattens it into arrays.
+
+    Node n's outgoing edges are edge_chars/edge_targets[edge_start[n]:edge_start[n + 1]],
+    sorted by character so transitions can be binary-searched.
+    """
+    children: list[dict[int, int]] = [{}]
+    out_term = array("i", [-1])
+    for term_id, term in enumerate(terms):
+        node = 0
+        for ch in _normalize(term):
+            code = ord(ch)
+            nxt = children[node].get(code)
+            if nxt is None:
+                nxt = len(children)
+                children[node][code] = nxt
+                children.append({})
+                out_term.append(-1)
+            node = nxt
+        out_term[node] = term_id
+
+    fail = array("I", [0]) * len(children)
+    # Nearest node along the fail chain that ends a term, for reporting overlapping matches
+    out_link = array("i", [-1]) * len(children)
+    queue = deque(children[0].values())
+    while queue:
+        node = queue.popleft()
+        for code, child in children[node].items():
+            f = fail[node]
+            while f and code not in children[f]:
+                f = fail[f]
+            target = children[f].get(code, 0)
+            fail[child] = target if target != child else 0
+            out_link[child] = fail[child] if out_term[fail[child]] >= 0 else out_link[fail[child]]
+            queue.append(child)
+
+    edge_start = array("I", [0])
+    edge_chars = array("I")
+    edge_targets = array("I")
+    for edges in children:
+        for code in sorted(edges):
+            edge_chars.append(code)
+            edge_targets.append(edges[code])
+        edge_start.append(len(edge_chars))
+
+    encoded = [term.encode("utf-8") for term in terms]
+    term_offsets = array("I", [0])
+    for e in encoded:
+        term_offsets.append(term_offsets[-1] + len(e))
+    term_lengths = array("I", [len(_normalize(term)) for term in terms])
+
+    return {
+        "edge_start": edge_start,
+        "edge_chars": edge_chars,
+        "edge_targets": edge_targets,
+        "fail": fail,
+        "out_term": out_term,
+        "out_link": out_link,
+        "term_offsets": term_offsets,
+        "term_lengths": term_lengths,
+        "blob": b"".join(encoded),
+    }
+
+
+_ARRAY_ORDER = ["edge_start", "edge_chars", "edge_targets", "fail", "out_term", "out_link", "term_offsets", "term_lengths"]
+
+
+def build_index(lexicon_path: str) -> bytes:
+    """Compiles the lexicon into the on-disk index format."""
+    stat = os.stat(lexicon_path)
+    compiled = compile_automaton(read_lexicon(lexicon_path))
+    header = _HEADER.pack(
+        _MAGIC, _FORMAT_VERSION, stat.st_mtime_ns, stat.st_size,
+        len(compiled["fail"]), len(compiled["edge_chars"]),
+        len(compiled["term_lengths"]), len(compiled["blob"]),
+    )
+    return header + b"".join(compiled[name].tobytes() for name in _ARRAY_ORDER) + compiled["blob"]
+
+
+def write_index(data: bytes, index_path: str) -> None:
+    """
+    Writes a compiled index atomically.
+
+    Each writer uses its own temporary file, so several workers compiling at
+    startup never replace the index with a half-written one.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(index_path), prefix=".acidx-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TermIndex:
+    """A memory-mapped Aho-Corasick automaton over a medical lexicon."""
+
+    def __init__(self, buffer: mmap.mmap | bytes):
+        self._buffer = buffer
+        magic, version, _, _, n_nodes, n_edges, n_terms, blob_len = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"Not a terminology index of version {_FORMAT_VERSION}")
+
+        sizes = {
+            "edge_start": n_nodes + 1, "edge_chars": n_edges, "edge_targets": n_edges,
+            "fail": n_nodes, "out_term": n_nodes, "out_link": n_nodes,
+            "term_offsets": n_terms + 1, "term_lengths": n_terms,
+        }
+        view = memoryview(buffer)
+        offset = _HEADER.size
+        for name in _ARRAY_ORDER:
+            fmt = "i" if name in ("out_term", "out_link") else "I"
+            setattr(self, "_" + name, view[offset:offset + 4 * sizes[name]].cast(fmt))
+            offset += 4 * sizes[name]
+        self._blob = view[offset:offset + blob_len]
+        self.term_count = n_terms
+
+    @classmethod
+    def from_file(cls, index_path: str) -> "TermIndex":
+        with open(index_path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def load(cls, lexicon_path: str = DEFAULT_LEXICON) -> "TermIndex":
+        """Maps the compiled index for a lexicon, recompiling it if the lexicon has changed."""
+        index_path = os.path.splitext(lexicon_path)[0] + ".acidx"
+        stat = os.stat(lexicon_path)
+        stale = True
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                header = f.read(_HEADER.size)
+            if len(header) == _HEADER.size:
+                magic, version, mtime_ns, size, *_ = _HEADER.unpack(header)
+                stale = (magic, version, mtime_ns, size) != (_MAGIC, _FORMAT_VERSION, stat.st_mtime_ns, stat.st_size)
+        if stale:
+            print(f"Compiling terminology index from {lexicon_path}...")
+            data = build_index(lexicon_path)
+            try:
+                write_index(data, index_path)
+            except OSError as e:
+                print(f"Could not write {index_path} ({e}); keeping the terminology index in memory.")
+                return cls(data)
+        return cls.from_file(index_path)
+
+    def term(self, term_id: int) -> str:
+        return bytes(self._blob[self._term_offsets[term_id]:self._term_offsets[term_id + 1]]).decode("utf-8")
+
+    def _step(self, node: int, code: int) -> int:
+        edge_start, edge_chars = self._edge_start, self._edge_chars
+        while True:
+            lo, hi = edge_start[node], edge_start[node + 1]
+            i = bisect_left(edge_chars, code, lo, hi)
+            if i < hi and edge_chars[i] == code:
+                return self._edge_targets[i]
+            if node == 0:
+                return 0
+            node = self._fail[node]
+
+    def annotate(self, text: str) -> list[dict]:
+        """
+        Finds every lexicon term occurring as whole words in `text`, in one pass.
+
+        Returns:
+            Dicts with 'start', 'end' (character offsets into `text`) and 'term'
+            (the lexicon spelling), ordered by end offset.
+        """
+        if not text:
+            return []
+        normalized = _normalize(text)
+        matches = []
+        node = 0
+        for pos, ch in enumerate(normalized):
+            node = self._step(node, ord(ch))
+            hit = node if self._out_term[node] >= 0 else self._out_link[node]
+            while hit > 0:
+                term_id = self._out_term[hit]
+                end = pos + 1
+                start = end - self._term_lengths[term_id]
+                if _is_boundary(normalized, start - 1) and _is_boundary(normalized, end):
+                    matches.append({"start": start, "end": end, "term": self.term(term_id)})
+                hit = self._out_link[hit]
+        return matches
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+def term_counts(matches: list[dict]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for match in matches:
+        counts[match["term"]] = counts.get(match["term"], 0) + 1
+    return counts
+
+
+def compare_sources(index: TermIndex, texts: dict[str, str | None]) -> dict:
+    """
+    Annotates several versions of the same recording and lines up their terms.
+
+    Args:
+        index: The loaded terminology index.
+        texts: Source name ('whisper', 'corti', 'improved', ...) to text.
+
+    Returns:
+        'annotations' per source, and 'terms': one entry per term with its count
+        in each source and 'disagreement' set when the Whisper and Corti counts
+        differ. Disagreements come first, most frequent first, so callers can
+        pick which spans are worth sending to the model.
+    """
+    annotations = {source: index.annotate(text or "") for source, text in texts.items()}
+    counts = {source: term_counts(matches) for source, matches in annotations.items()}
+    all_terms = set().union(*counts.values()) if counts else set()
+
+    terms = []
+    for term in all_terms:
+        per_source = {source: counts[source].get(term, 0) for source in counts}
+        disagreement = per_source.get("whisper", 0) != per_source.get("corti", 0)
+        terms.append({"term": term, "counts": per_source, "disagreement": disagreement})
+    terms.sort(key=lambda t: (not t["disagreement"], -sum(t["counts"].values()), t["term"]))
+    return {"annotations": annotations, "terms": terms}
+
+
+_index: TermIndex | None = None
+
+def get_term_index() -> TermIndex:
+    """Returns the process-wide index for the default lexicon, loading it on first use."""
+    global _index
+    if _index is None:
+        _index = TermIndex.load()
+    return _index
@@ -1,5 +1,5 @@
 import os
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from pydantic import BaseModel, Field
 from typing import List
 from dotenv import load_dotenv
@@ -10,10 +10,13 @@ load_dotenv()
 # --- 1. Setup OpenAI Client ---
 try:
     client = OpenAI()
+    # Used from async request handlers, so the event loop is not blocked
+    async_client = AsyncOpenAI()
 except Exception as e:
     print(f"Error initializing OpenAI client: {e}")
     # In a real app, you'd want more robust error handling
     client = None
+    async_client = None
 
 # --- 2. Define the desired JSON output structure using Pydantic ---
 class Sentence(BaseModel):
@@ -85,4 +88,85 @@ def improve_transcript_with_gpt(whisper_text: str, corti_text: str) -> ImprovedT
         return response.output_parsed
     except Exception as e:
         print(f"An error occurred while improving the transcript: {e}")
-        return None
\ No newline at end of file
+        return None
+
+class RefinedSentence(Sentence):
+    """A re-improved sentence, tied back to the sentence it replaces."""
+    id: str = Field(description="The id of the target sentence this replaces, copied verbatim.")
+
+class RefinedSentences(BaseModel):
+    """The re-improved target sentences."""
+    sentences: List[RefinedSentence]
+
+async def refine_sentences_with_gpt(
+    targets: List[dict], context: List[dict], excerpts: List[dict]
+) -> RefinedSentences | None:
+    """
+    Re-runs the improvement on a few sentences of an existing improved transcript.
+
+    Only the target sentences, their neighbours and the matching stretches of the
+    two source transcripts are sent, so the cost scales with the number of
+    dirty/uncertain sentences rather than the transcript length.
+
+    Args:
+        targets: Sentences to re-improve, each with an 'id' and the Sentence fields.
+        context: Neighbouring sentences, given to the model for context only.
+        excerpts: Dicts with the 'whisper' and 'corti' text around the targets, see sentence_versions.source_excerpts.
+    """
+    if not async_client:
+        print("OpenAI client not initialized.")
+        return None
+
+    print(f"\nAsking OpenAI to refine {len(targets)} sentence(s)...")
+
+    system_prompt = """
+    You are an expert medical transcription assistant. You are reviewing a few sentences of a transcript that has already been improved.
+    Some target sentences were edited by a user or were marked as uncertain. Re-check each target sentence against the excerpts of the original Whisper and Corti transcripts it was made from, using the surrounding context sentences and your medical knowledge.
+
+    Follow these rules:
+    1.  Return exactly one sentence per target sentence, with the same `id`. Do not return the context sentences.
+    2.  Find the part of the Whisper and Corti excerpts that each target sentence corresponds to. Where they agree, use that text. Where they disagree, use your best judgment and medical knowledge, as for a full transcript.
+    3.  Keep a user's edit unless it is clearly a typo or a wrong medical term.
+    4.  Set `is_uncertain`, `has_medical_terminology`, `specific_uncertain_word`, `best_model_for_medical_terminology` and `best_everyday_speech` by the same rules as for a full transcript, keeping the previous labels if you have no new evidence.
+    """
+
+    context_lines = "\n".join(f"- {s['text']}" for s in context)
+    target_lines = "\n".join(
+        f"- id={s['id']} uncertain_words={s.get('specific_uncertain_word', [])} "
+        f"med={s.get('best_model_for_medical_terminology')} speech={s.get('best_everyday_speech')}: {s['text']}"
+        for s in targets
+    )
+    excerpt_blocks = "\n".join(
+        f"<whisper_excerpt>\n{e['whisper']}\n</whisper_excerpt>\n<corti_excerpt>\n{e['corti']}\n</corti_excerpt>"
+        for e in excerpts
+    )
+    user_prompt = f"""
+    <source_excerpts>
+    {excerpt_blocks}
+    </source_excerpts>
+
+    <context_sentences>
+    {context_lines}
+    </context_sentences>
+
+    <target_sentences>
+    {target_lines}
+    </target_sentences>
+
+    Please return the refined target sentences now.
+    """
+
+    try:
+        response = await async_client.responses.parse(
+            model="o4-mini",
+            input=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            text_format=RefinedSentences
+        )
+        print("Successfully refined sentences.")
+        return response.output_parsed
+    except Exception as e:
+        print(f"An error occurred while refining sentences: {e}")
+        return None
@@ -0,0 +1,92 @@
+import uuid
+import asyncio
+import argparse
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal, Transcript, TranscriptTerm, init_db
+from .terminology import get_term_index, term_counts
+
+# --- Stored term counts ---
+# transcript_terms holds how often each lexicon term occurs per transcript and
+# source ("whisper", "corti", "improved"); GET /terms/search reads it. Rows are
+# written when a job completes and whenever its improved transcript is saved.
+# Transcripts stored before the table existed are indexed with:
+#
+#   uv run python -m dataexploration.transcript_terms --backfill
+
+
+def improved_text(improved_transcript: dict | None) -> str:
+    if not improved_transcript:
+        return ""
+    return " ".join(s.get("text", "") for s in improved_transcript.get("sentences", []))
+
+
+async def index_transcript_terms(db: AsyncSession, transcript_id: uuid.UUID, texts: dict[str, str | None]) -> None:
+    """Replaces the stored term counts of the given sources. The caller commits."""
+    index = get_term_index()
+    await db.execute(
+        delete(TranscriptTerm).where(
+            TranscriptTerm.transcript_id == transcript_id, TranscriptTerm.source.in_(list(texts))
+        )
+    )
+    for source, text in texts.items():
+        for term, count in term_counts(index.annotate(text or "")).items():
+            db.add(TranscriptTerm(
+                transcript_id=transcript_id, source=source, term=term, term_key=term.lower(), count=count
+            ))
+
+
+async def backfill_transcript_terms(batch_size: int = 200) -> int:
+    """
+    Indexes completed transcripts that have no term rows yet, a batch per transaction.
+
+    Walks the table by id, so transcripts without any lexicon term are visited only once.
+
+    Returns:
+        The number of transcripts indexed.
+    """
+    indexed = 0
+    last_id = None
+    has_terms = select(TranscriptTerm.id).where(TranscriptTerm.transcript_id == Transcript.id).exists()
+    while True:
+        async with AsyncSessionLocal() as session:
+            query = (
+                select(Transcript.id, Transcript.whisper_transcript, Transcript.corti_transcript,
+                       Transcript.improved_transcript)
+                .where(Transcript.status == "completed", ~has_terms)
+                .order_by(Transcript.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(Transcript.id > last_id)
+            rows = (await session.execute(query)).all()
+            if not rows:
+                return indexed
+            for row in rows:
+                await index_transcript_terms(session, row.id, {
+                    "whisper": row.whisper_transcript,
+                    "corti": row.corti_transcript,
+                    "improved": improved_text(row.improved_transcript),
+                })
+            await session.commit()
+        indexed += len(rows)
+        last_id = rows[-1].id
+        print(f"Indexed terms of {indexed} transcript(s)...")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the stored lexicon term counts of transcripts.")
+    parser.add_argument("--backfill", action="store_true", help="Index completed transcripts that have no term rows")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.error("nothing to do; pass --backfill")
+
+    async def main():
+        await init_db()
+        count = await backfill_transcript_terms(args.batch_size)
+        print(f"Done: indexed terms of {count} transcript(s).")
+
+    asyncio.run(main())